@@ -1,8 +1,11 @@
 # api/index.py
 """FastAPI serverless function for Vercel."""
 import os
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 # Add backend to path for local dev
@@ -10,9 +13,25 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
 
-from cline_agent.agent.core import Agent
+from cline_agent.agent.pool import AgentPool
+from cline_agent.cache.response_cache import bypass_response_cache
+
+from .utils.stream import patch_response_with_headers, stream_agent_events
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared agent pool once per worker and warm provider connections."""
+    pool = AgentPool()
+    await pool.warm()
+    app.state.agent_pool = pool
+    try:
+        yield
+    finally:
+        await pool.aclose()
 
-app = FastAPI(title="Cline Agent API", version="0.8.0")
+
+app = FastAPI(title="Cline Agent API", version="0.8.0", lifespan=lifespan)
 
 # CORS for local development
 app.add_middleware(
@@ -24,6 +43,19 @@ app.add_middleware(
 )
 
 
+def _agent_pool(request: Request) -> AgentPool:
+    """Return the worker's pool, creating it lazily when lifespan did not run."""
+    pool = getattr(request.app.state, "agent_pool", None)
+    if pool is None:
+        pool = request.app.state.agent_pool = AgentPool()
+    return pool
+
+
+def _apply_cache_bypass(request: Request) -> None:
+    """Honour ``X-LLM-Cache: bypass`` for every LLM call made by this request."""
+    bypass_response_cache.set(request.headers.get("x-llm-cache", "").lower() == "bypass")
+
+
 class RunTaskRequest(BaseModel):
     task: str
     mode: str = "plan_act"
@@ -41,19 +73,46 @@ async def health() -> HealthResponse:
 
 
 @app.post("/api/run-task")
-async def run_task(payload: RunTaskRequest):
+async def run_task(payload: RunTaskRequest, request: Request):
     """
     Execute a task using the cline-agent.
     Mirrors the CLI `cline-agent task` command.
     """
     try:
-        agent = Agent()
-        result = agent.run_task(payload.task, mode=payload.mode)
+        _apply_cache_bypass(request)
+        agent = _agent_pool(request).get()
+        result = await agent.run_task(payload.task, mode=payload.mode)
         return result.model_dump() if hasattr(result, "model_dump") else result
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+@app.post("/api/run-task/stream")
+async def run_task_stream(payload: RunTaskRequest, request: Request):
+    """
+    Streaming variant of /api/run-task.
+    Emits plan, safety, execution, reflection and retry events as Server-Sent
+    Events as soon as each phase finishes, followed by the final result.
+    """
+    _apply_cache_bypass(request)
+    agent = _agent_pool(request).get()
+    events = agent.run_task_events(payload.task, mode=payload.mode)
+    response = StreamingResponse(stream_agent_events(events), media_type="text/event-stream")
+    return patch_response_with_headers(response)
+
+
+@app.get("/api/metrics")
+async def metrics(request: Request):
+    """Cache hit/miss counters for the worker's shared agent pool."""
+    return {"success": True, "metrics": _agent_pool(request).metrics()}
+
+
+@app.get("/api/providers")
+async def providers(request: Request):
+    """LLM provider health, circuit breakers and the last routing decision per phase."""
+    return {"success": True, **_agent_pool(request).router.provider_state()}
+
+
 @app.get("/api/config")
 async def get_config():
     """Get current agent configuration (secrets masked)."""
@@ -0,0 +1,184 @@
+import logging
+import os
+from typing import List, Optional, Sequence, Tuple
+
+from openai.types.chat.chat_completion_message_param import ChatCompletionMessageParam
+from pydantic import BaseModel
+
+try:  # Exact counts when tiktoken is installed; a chars/4 estimate otherwise.
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("CHAT_TOKEN_BUDGET", "16000"))
+DEFAULT_KEEP_RECENT_TURNS = int(os.getenv("CHAT_KEEP_RECENT_TURNS", "3"))
+
+# Rough per-message framing cost and the price of a low-detail image.
+MESSAGE_OVERHEAD_TOKENS = 4
+IMAGE_TOKENS = 85
+# Old tool outputs larger than this are replaced by a short preview.
+TOOL_OUTPUT_KEEP_TOKENS = 64
+TOOL_OUTPUT_PREVIEW_CHARS = 160
+
+_encoding = None
+
+
+def _encoder():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:  # encoding files unavailable offline
+            return None
+    return _encoding
+
+
+def count_text_tokens(text: str) -> int:
+    encoding = _encoder()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def count_message_tokens(message: ChatCompletionMessageParam) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS
+    content = message.get("content")
+    if isinstance(content, str):
+        tokens += count_text_tokens(content)
+    elif isinstance(content, list):
+        for part in content:
+            if part.get("type") == "image_url":
+                tokens += IMAGE_TOKENS
+            else:
+                tokens += count_text_tokens(part.get("text") or "")
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function", {})
+        tokens += count_text_tokens(function.get("name", "")) + count_text_tokens(function.get("arguments", ""))
+    return tokens
+
+
+class CompactionReport(BaseModel):
+    budget: int
+    tokens_before: int
+    tokens_after: int
+    elided_tool_outputs: int = 0
+    dropped_images: int = 0
+    dropped_messages: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _turn_starts(messages: Sequence[ChatCompletionMessageParam]) -> List[int]:
+    return [i for i, message in enumerate(messages) if message.get("role") == "user"]
+
+
+def _elide_tool_output(message: ChatCompletionMessageParam) -> Optional[ChatCompletionMessageParam]:
+    content = message.get("content")
+    if not isinstance(content, str) or count_text_tokens(content) <= TOOL_OUTPUT_KEEP_TOKENS:
+        return None
+    preview = content[:TOOL_OUTPUT_PREVIEW_CHARS].replace("\n", " ")
+    summary = f"[earlier tool output elided: {len(content)} chars] {preview}…"
+    return {**message, "content": summary}
+
+
+def _drop_images(message: ChatCompletionMessageParam) -> Tuple[Optional[ChatCompletionMessageParam], int]:
+    content = message.get("content")
+    if not isinstance(content, list):
+        return None, 0
+    kept = [part for part in content if part.get("type") != "image_url"]
+    dropped = len(content) - len(kept)
+    if not dropped:
+        return None, 0
+    kept.append({"type": "text", "text": f"[{dropped} earlier image(s) omitted]"})
+    return {**message, "content": kept}, dropped
+
+
+def compact_messages(
+    messages: Sequence[ChatCompletionMessageParam],
+    budget: int = DEFAULT_TOKEN_BUDGET,
+    keep_recent_turns: int = DEFAULT_KEEP_RECENT_TURNS,
+    counts: Optional[Sequence[int]] = None,
+) -> Tuple[List[ChatCompletionMessageParam], CompactionReport]:
+    """Shrink a chat history until it fits ``budget`` prompt tokens.
+
+    System messages and the last ``keep_recent_turns`` turns (a turn starts
+    at a user message) are kept verbatim. Older messages are compacted in
+    order of increasing loss: large tool outputs become short previews, then
+    image parts are dropped, then whole turns are removed oldest first so
+    assistant tool calls never lose their tool results. The input is not
+    modified; changed messages are shallow copies.
+
+    ``counts`` are the messages' token counts if the caller already has them
+    (``prompt.ConversionCache`` keeps them per message); otherwise every
+    message is tokenized.
+    """
+    compacted = list(messages)
+    counts = list(counts) if counts is not None else [count_message_tokens(message) for message in compacted]
+    before = sum(counts)
+    report = CompactionReport(budget=budget, tokens_before=before, tokens_after=before)
+    if before <= budget:
+        return compacted, report
+
+    starts = _turn_starts(compacted)
+    if keep_recent_turns <= 0:
+        protected_from = len(compacted)
+    elif keep_recent_turns <= len(starts):
+        protected_from = starts[-keep_recent_turns]
+    else:
+        protected_from = 0
+    old = [i for i in range(protected_from) if compacted[i].get("role") != "system"]
+    total = before
+
+    def replace(index: int, message: ChatCompletionMessageParam) -> None:
+        nonlocal total
+        new_count = count_message_tokens(message)
+        total += new_count - counts[index]
+        counts[index] = new_count
+        compacted[index] = message
+
+    for index in old:
+        if total <= budget:
+            break
+        if compacted[index].get("role") == "tool":
+            elided = _elide_tool_output(compacted[index])
+            if elided is not None:
+                replace(index, elided)
+                report.elided_tool_outputs += 1
+
+    for index in old:
+        if total <= budget:
+            break
+        stripped, dropped = _drop_images(compacted[index])
+        if stripped is not None:
+            replace(index, stripped)
+            report.dropped_images += dropped
+
+    if total > budget:
+        old_starts = [i for i in starts if i < protected_from]
+        drop: set = set()
+        for position, start in enumerate(old_starts):
+            if total <= budget:
+                break
+            end = old_starts[position + 1] if position + 1 < len(old_starts) else protected_from
+            # Messages before the first user turn (other than system) go with it.
+            first = 0 if position == 0 else start
+            for index in range(first, end):
+                if compacted[index].get("role") != "system" and index not in drop:
+                    drop.add(index)
+                    total -= counts[index]
+        if drop:
+            compacted = [message for index, message in enumerate(compacted) if index not in drop]
+            report.dropped_messages = len(drop)
+
+    report.tokens_after = total
+    logger.info(
+        "chat history compacted: %d -> %d tokens (budget %d, %d tool outputs elided, "
+        "%d images dropped, %d messages dropped)",
+        report.tokens_before, report.tokens_after, budget, report.elided_tool_outputs,
+        report.dropped_images, report.dropped_messages,
+    )
+    return compacted, report
@@ -0,0 +1,98 @@
+import json
+from typing import Any, List, Optional
+
+_CLOSERS = {"{": "}", "[": "]"}
+# partial() re-parses the whole prefix, so it only does so once the complete
+# part has grown by this fraction: total parsing stays linear in the input.
+REPARSE_GROWTH = 0.25
+
+
+class PartialJSONParser:
+    """Incrementally scan a streamed JSON document (e.g. tool call arguments).
+
+    ``feed`` is O(len(chunk)): it tracks nesting and string state and
+    remembers the last point where every member/element so far is complete.
+    ``partial()`` returns the document up to that point, closed, so a
+    partial value only ever holds finished keys and values (never half a
+    number or string). ``complete`` turns true once the top-level value closes.
+
+    Each ``partial()`` that re-parses is O(len(buffer)); it only re-parses
+    after the complete prefix grew by ``REPARSE_GROWTH`` (or the value
+    closed), so the partial value lags slightly on large documents.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._length = 0
+        self.complete = False
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._cut = 0
+        self._cut_closers = ""
+        self._parsed_cut = -1
+        self._partial: Any = None
+
+    def feed(self, chunk: str) -> bool:
+        """Consume ``chunk``; return True if ``partial()`` may have changed."""
+        start = self._length
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        cut_before = self._cut
+        for offset, char in enumerate(chunk):
+            if self.complete:
+                break
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in _CLOSERS:
+                self._stack.append(char)
+                self._mark(start + offset + 1)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    self.complete = True
+                self._mark(start + offset + 1)
+            elif char == ",":
+                self._mark(start + offset)
+        return self._cut != cut_before and self._due()
+
+    @property
+    def buffer(self) -> str:
+        """Everything fed so far (chunks are joined only when the text is needed)."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def _mark(self, position: int) -> None:
+        self._cut = position
+        self._cut_closers = "".join(_CLOSERS[c] for c in reversed(self._stack))
+
+    def _due(self) -> bool:
+        """Whether the complete prefix grew enough to be worth re-parsing."""
+        grown = self._cut - max(self._parsed_cut, 0)
+        return self._parsed_cut < 0 or self.complete or grown >= self._parsed_cut * REPARSE_GROWTH
+
+    def partial(self) -> Optional[Any]:
+        """The value made of complete members so far, or None before any."""
+        if self._parsed_cut == self._cut or not self._due():
+            return self._partial
+        text = self.buffer[: self._cut]
+        try:
+            self._partial = json.loads(text + self._cut_closers) if text.strip() else None
+        except ValueError:
+            return self._partial
+        self._parsed_cut = self._cut
+        return self._partial
+
+    def value(self) -> Any:
+        """The complete value; raises ``ValueError`` if it is not valid JSON."""
+        return json.loads(self.buffer) if self.buffer.strip() else {}
@@ -1,11 +1,22 @@
+import hashlib
 import json
+import os
+import threading
+from collections import OrderedDict
 from enum import Enum
-from typing import Any, List, Optional
+from typing import Any, Hashable, List, Optional, Tuple
 
 from openai.types.chat.chat_completion_message_param import ChatCompletionMessageParam
 from pydantic import BaseModel, ConfigDict
 
 from .attachment import ClientAttachment
+from .compaction import (
+    DEFAULT_KEEP_RECENT_TURNS,
+    DEFAULT_TOKEN_BUDGET,
+    CompactionReport,
+    compact_messages,
+    count_message_tokens,
+)
 
 
 class ToolInvocationState(str, Enum):
@@ -38,6 +49,7 @@ class ClientMessagePart(BaseModel):
 
 
 class ClientMessage(BaseModel):
+    id: Optional[str] = None
     role: str
     content: Optional[str] = None
     parts: Optional[List[ClientMessagePart]] = None
@@ -45,136 +57,246 @@ class ClientMessage(BaseModel):
     toolInvocations: Optional[List[ToolInvocation]] = None
 
 
-def convert_to_openai_messages(messages: List[ClientMessage]) -> List[ChatCompletionMessageParam]:
-    openai_messages = []
-
-    for message in messages:
-        message_parts: List[dict] = []
-        tool_calls = []
-        tool_result_messages = []
-
-        if message.parts:
-            for part in message.parts:
-                if part.type == 'text':
-                    # Ensure empty strings default to ''
-                    message_parts.append({
-                        'type': 'text',
-                        'text': part.text or ''
-                    })
-
-                elif part.type == 'file':
-                    if part.contentType and part.contentType.startswith('image') and part.url:
-                        message_parts.append({
-                            'type': 'image_url',
-                            'image_url': {
-                                'url': part.url
-                            }
-                        })
-                    elif part.url:
-                        # Fall back to including the URL as text if we cannot map the file directly.
-                        message_parts.append({
-                            'type': 'text',
-                            'text': part.url
-                        })
-
-                elif part.type.startswith('tool-'):
-                    tool_call_id = part.toolCallId
-                    tool_name = part.toolName or part.type.replace('tool-', '', 1)
-
-                    if tool_call_id and tool_name:
-                        should_emit_tool_call = False
-
-                        if part.state and any(keyword in part.state for keyword in ('call', 'input')):
-                            should_emit_tool_call = True
-
-                        if part.input is not None or part.args is not None:
-                            should_emit_tool_call = True
-
-                        if should_emit_tool_call:
-                            arguments = part.input if part.input is not None else part.args
-                            if isinstance(arguments, str):
-                                serialized_arguments = arguments
-                            else:
-                                serialized_arguments = json.dumps(arguments or {})
-
-                            tool_calls.append({
-                                "id": tool_call_id,
-                                "type": "function",
-                                "function": {
-                                    "name": tool_name,
-                                    "arguments": serialized_arguments
-                                }
-                            })
-
-                        if part.state == 'output-available' and part.output is not None:
-                            tool_result_messages.append({
-                                "role": "tool",
-                                "tool_call_id": tool_call_id,
-                                "content": json.dumps(part.output),
-                            })
-
-        elif message.content is not None:
-            message_parts.append({
-                'type': 'text',
-                'text': message.content
-            })
+def _convert_message(message: ClientMessage) -> List[ChatCompletionMessageParam]:
+    """Convert one client message (plus the tool results it carries)."""
+    converted: List[ChatCompletionMessageParam] = []
+    message_parts: List[dict] = []
+    tool_calls = []
+    tool_result_messages = []
+
+    if message.parts:
+        for part in message.parts:
+            if part.type == 'text':
+                # Ensure empty strings default to ''
+                message_parts.append({
+                    'type': 'text',
+                    'text': part.text or ''
+                })
 
-        if not message.parts and message.experimental_attachments:
-            for attachment in message.experimental_attachments:
-                if attachment.contentType.startswith('image'):
+            elif part.type == 'file':
+                if part.contentType and part.contentType.startswith('image') and part.url:
                     message_parts.append({
                         'type': 'image_url',
                         'image_url': {
-                            'url': attachment.url
+                            'url': part.url
                         }
                     })
-
-                elif attachment.contentType.startswith('text'):
+                elif part.url:
+                    # Fall back to including the URL as text if we cannot map the file directly.
                     message_parts.append({
                         'type': 'text',
-                        'text': attachment.url
+                        'text': part.url
                     })
 
-        if(message.toolInvocations):
-            for toolInvocation in message.toolInvocations:
-                tool_calls.append({
-                    "id": toolInvocation.toolCallId,
-                    "type": "function",
-                    "function": {
-                        "name": toolInvocation.toolName,
-                        "arguments": json.dumps(toolInvocation.args)
+            elif part.type.startswith('tool-'):
+                tool_call_id = part.toolCallId
+                tool_name = part.toolName or part.type.replace('tool-', '', 1)
+
+                if tool_call_id and tool_name:
+                    should_emit_tool_call = False
+
+                    if part.state and any(keyword in part.state for keyword in ('call', 'input')):
+                        should_emit_tool_call = True
+
+                    if part.input is not None or part.args is not None:
+                        should_emit_tool_call = True
+
+                    if should_emit_tool_call:
+                        arguments = part.input if part.input is not None else part.args
+                        if isinstance(arguments, str):
+                            serialized_arguments = arguments
+                        else:
+                            serialized_arguments = json.dumps(arguments or {})
+
+                        tool_calls.append({
+                            "id": tool_call_id,
+                            "type": "function",
+                            "function": {
+                                "name": tool_name,
+                                "arguments": serialized_arguments
+                            }
+                        })
+
+                    if part.state == 'output-available' and part.output is not None:
+                        tool_result_messages.append({
+                            "role": "tool",
+                            "tool_call_id": tool_call_id,
+                            "content": json.dumps(part.output),
+                        })
+
+    elif message.content is not None:
+        message_parts.append({
+            'type': 'text',
+            'text': message.content
+        })
+
+    if not message.parts and message.experimental_attachments:
+        for attachment in message.experimental_attachments:
+            if attachment.contentType.startswith('image'):
+                message_parts.append({
+                    'type': 'image_url',
+                    'image_url': {
+                        'url': attachment.url
                     }
                 })
 
-        if message_parts:
-            if len(message_parts) == 1 and message_parts[0]['type'] == 'text':
-                content_payload = message_parts[0]['text']
-            else:
-                content_payload = message_parts
-        else:
-            # Ensure that we always provide some content for OpenAI
-            content_payload = ""
+            elif attachment.contentType.startswith('text'):
+                message_parts.append({
+                    'type': 'text',
+                    'text': attachment.url
+                })
 
-        openai_message: ChatCompletionMessageParam = {
-            "role": message.role,
-            "content": content_payload,
+    if(message.toolInvocations):
+        for toolInvocation in message.toolInvocations:
+            tool_calls.append({
+                "id": toolInvocation.toolCallId,
+                "type": "function",
+                "function": {
+                    "name": toolInvocation.toolName,
+                    "arguments": json.dumps(toolInvocation.args)
+                }
+            })
+
+    if message_parts:
+        if len(message_parts) == 1 and message_parts[0]['type'] == 'text':
+            content_payload = message_parts[0]['text']
+        else:
+            content_payload = message_parts
+    else:
+        # Ensure that we always provide some content for OpenAI
+        content_payload = ""
+
+    openai_message: ChatCompletionMessageParam = {
+        "role": message.role,
+        "content": content_payload,
+    }
+
+    if tool_calls:
+        openai_message["tool_calls"] = tool_calls
+
+    converted.append(openai_message)
+
+    if(message.toolInvocations):
+        for toolInvocation in message.toolInvocations:
+            tool_message = {
+                "role": "tool",
+                "tool_call_id": toolInvocation.toolCallId,
+                "content": json.dumps(toolInvocation.result),
+            }
+
+            converted.append(tool_message)
+
+    converted.extend(tool_result_messages)
+
+    return converted
+
+
+class ConversionCache:
+    """Bounded LRU of converted messages.
+
+    ``useChat`` re-posts the whole history every turn; with this cache only
+    new or edited messages are converted. Messages with an ``id`` are keyed
+    on it plus the length and state of each part, which is cheap and catches
+    the edits ``useChat`` makes in place (tool outputs arriving, text
+    regenerated); messages without one fall back to a hash of their content.
+    Token counts for compaction are stored with each entry the first time
+    they are needed. Cached messages are shared between requests and must be
+    treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        # key -> [converted messages, their token counts or None]
+        self._data: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(message: ClientMessage) -> Hashable:
+        if message.id is None or message.experimental_attachments or message.toolInvocations:
+            return hashlib.blake2b(message.model_dump_json().encode(), digest_size=16).digest()
+        parts = tuple(
+            (part.type, part.state, part.toolCallId, len(part.text or part.url or ""),
+             part.input is None and part.args is None, part.output is None)
+            for part in message.parts or ()
+        )
+        return (message.id, message.role, len(message.content or ""), parts)
+
+    def _entry(self, message: ClientMessage) -> list:
+        key = self.key(message)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = [tuple(_convert_message(message)), None]
+        with self._lock:
+            self._data[key] = entry
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return entry
+
+    def convert(self, message: ClientMessage) -> Tuple[ChatCompletionMessageParam, ...]:
+        return self._entry(message)[0]
+
+    def convert_counted(
+        self, message: ClientMessage
+    ) -> Tuple[Tuple[ChatCompletionMessageParam, ...], Tuple[int, ...]]:
+        """The converted messages and their token counts, each computed once per entry."""
+        entry = self._entry(message)
+        if entry[1] is None:
+            entry[1] = tuple(count_message_tokens(m) for m in entry[0])
+        return entry[0], entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
         }
 
-        if tool_calls:
-            openai_message["tool_calls"] = tool_calls
 
-        openai_messages.append(openai_message)
+_conversion_cache = ConversionCache(int(os.getenv("CHAT_CONVERSION_CACHE_SIZE", "2048")))
 
-        if(message.toolInvocations):
-            for toolInvocation in message.toolInvocations:
-                tool_message = {
-                    "role": "tool",
-                    "tool_call_id": toolInvocation.toolCallId,
-                    "content": json.dumps(toolInvocation.result),
-                }
 
-                openai_messages.append(tool_message)
+def convert_to_openai_messages(
+    messages: List[ClientMessage],
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    keep_recent_turns: int = DEFAULT_KEEP_RECENT_TURNS,
+) -> Tuple[List[ChatCompletionMessageParam], Optional[CompactionReport]]:
+    """Convert client messages to OpenAI chat messages.
 
-        openai_messages.extend(tool_result_messages)
+    The converted history is compacted to fit ``token_budget`` (default
+    ``CHAT_TOKEN_BUDGET``; None or 0 disables it, see
+    ``compaction.compact_messages``); system messages and the last
+    ``keep_recent_turns`` turns are always kept verbatim. Returns the
+    messages and the compaction report (None when compaction is disabled).
+    Per-message results come from a shared :class:`ConversionCache`; do not
+    mutate them.
+    """
+    openai_messages = []
+
+    if not token_budget:
+        for message in messages:
+            openai_messages.extend(_conversion_cache.convert(message))
+        return openai_messages, None
+
+    counts: List[int] = []
+    for message in messages:
+        converted, message_counts = _conversion_cache.convert_counted(message)
+        openai_messages.extend(converted)
+        counts.extend(message_counts)
+    openai_messages, report = compact_messages(openai_messages, token_budget, keep_recent_turns, counts=counts)
 
-    return openai_messages
+    return openai_messages, report
@@ -1,25 +1,65 @@
+import asyncio
 import json
+import logging
+import time
 import traceback
 import uuid
-from typing import Any, Callable, Dict, Mapping, Sequence
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Mapping, Optional, Sequence, Union
 
+from fastapi import Request
 from fastapi.responses import StreamingResponse
-from openai import OpenAI
+from openai import AsyncOpenAI
 from openai.types.chat.chat_completion_message_param import ChatCompletionMessageParam
+from pydantic import BaseModel
 
+from .partial_json import PartialJSONParser
 
-def stream_text(
-    client: OpenAI,
+if TYPE_CHECKING:
+    from cline_agent.tools.runtime import ToolRuntime
+
+# Either plain callables (run in a thread, no limits) or a ToolRuntime.
+Tools = Union[Mapping[str, Callable[..., Any]], "ToolRuntime"]
+
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+# How often (seconds) the stream polls the client for a disconnect.
+DISCONNECT_POLL_INTERVAL = 0.1
+
+
+async def _completion_parts(
+    client: AsyncOpenAI,
     messages: Sequence[ChatCompletionMessageParam],
     tool_definitions: Sequence[Dict[str, Any]],
-    available_tools: Mapping[str, Callable[..., Any]],
-    protocol: str = "data",
-):
-    """Yield Server-Sent Events for a streaming chat completion."""
-    try:
-        def format_sse(payload: dict) -> str:
-            return f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
+    available_tools: Tools,
+    request: Optional[Request],
+    model: str,
+    early_tool_dispatch: bool = True,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield UI message stream parts (unformatted) for a streaming chat completion.
+
+    Tool call arguments are parsed incrementally: completed members are sent
+    as transient ``data-tool-input-partial`` parts, and with
+    ``early_tool_dispatch`` a call starts running as soon as its arguments
+    close (or the next call begins), while the model is still streaming.
+    """
+    stream = None
+    last_poll = time.monotonic()
+    tool_tasks: Dict[int, asyncio.Task] = {}
+
+    async def disconnected() -> bool:
+        nonlocal last_poll
+        if request is None or time.monotonic() - last_poll < DISCONNECT_POLL_INTERVAL:
+            return False
+        last_poll = time.monotonic()
+        return await request.is_disconnected()
 
+    try:
         message_id = f"msg-{uuid.uuid4().hex}"
         text_stream_id = "text-1"
         text_started = False
@@ -28,16 +68,79 @@ def stream_text(
         usage_data = None
         tool_calls_state: Dict[int, Dict[str, Any]] = {}
 
-        yield format_sse({"type": "start", "messageId": message_id})
-
-        stream = client.chat.completions.create(
+        async def run_tool(tool_name: str, arguments: Dict[str, Any]) -> Any:
+            if isinstance(available_tools, Mapping):
+                return await asyncio.to_thread(available_tools[tool_name], **arguments)
+            return await available_tools.call(tool_name, **arguments)
+
+        def dispatch(index: int) -> List[Dict[str, Any]]:
+            """Parse a finished tool call and start it; returns the parts to send."""
+            state = tool_calls_state[index]
+            tool_call_id, tool_name = state["id"], state["name"]
+            state["dispatched"] = True
+            parts: List[Dict[str, Any]] = []
+            if not state["started"]:
+                parts.append({"type": "tool-input-start", "toolCallId": tool_call_id, "toolName": tool_name})
+                state["started"] = True
+
+            try:
+                parsed_arguments = state["parser"].value()
+            except Exception as error:
+                parts.append({
+                    "type": "tool-input-error",
+                    "toolCallId": tool_call_id,
+                    "toolName": tool_name,
+                    "input": state["parser"].buffer,
+                    "errorText": str(error),
+                })
+                return parts
+
+            parts.append({
+                "type": "tool-input-available",
+                "toolCallId": tool_call_id,
+                "toolName": tool_name,
+                "input": parsed_arguments,
+            })
+            if tool_name not in available_tools:
+                parts.append({
+                    "type": "tool-output-error",
+                    "toolCallId": tool_call_id,
+                    "errorText": f"Tool '{tool_name}' not found.",
+                })
+            else:
+                tool_tasks[index] = asyncio.create_task(run_tool(tool_name, parsed_arguments))
+            return parts
+
+        def tool_output(index: int) -> Dict[str, Any]:
+            task = tool_tasks.pop(index)
+            tool_call_id = tool_calls_state[index]["id"]
+            error = task.exception()
+            if error is not None:
+                return {"type": "tool-output-error", "toolCallId": tool_call_id, "errorText": str(error)}
+            return {"type": "tool-output-available", "toolCallId": tool_call_id, "output": task.result()}
+
+        def ready(index: int) -> bool:
+            state = tool_calls_state[index]
+            return not state["dispatched"] and state["id"] is not None and state["name"] is not None
+
+        yield {"type": "start", "messageId": message_id}
+
+        stream = await client.chat.completions.create(
             messages=messages,
-            model="gpt-4o",
+            model=model,
             stream=True,
             tools=tool_definitions,
         )
 
-        for chunk in stream:
+        async for chunk in stream:
+            if await disconnected():
+                logger.debug("Client disconnected; cancelling upstream completion")
+                return
+
+            # Report tools that finished while the model kept streaming.
+            for index in [i for i, task in tool_tasks.items() if task.done()]:
+                yield tool_output(index)
+
             for choice in chunk.choices:
                 if choice.finish_reason is not None:
                     finish_reason = choice.finish_reason
@@ -48,22 +151,28 @@ def stream_text(
 
                 if delta.content is not None:
                     if not text_started:
-                        yield format_sse({"type": "text-start", "id": text_stream_id})
+                        yield {"type": "text-start", "id": text_stream_id}
                         text_started = True
-                    yield format_sse(
-                        {"type": "text-delta", "id": text_stream_id, "delta": delta.content}
-                    )
+                    yield {"type": "text-delta", "id": text_stream_id, "delta": delta.content}
 
                 if delta.tool_calls:
                     for tool_call_delta in delta.tool_calls:
                         index = tool_call_delta.index
+                        if early_tool_dispatch and index not in tool_calls_state:
+                            # A new call has begun, so earlier calls (even ones
+                            # with empty arguments) are complete.
+                            for earlier in sorted(tool_calls_state):
+                                if ready(earlier):
+                                    for part in dispatch(earlier):
+                                        yield part
                         state = tool_calls_state.setdefault(
                             index,
                             {
                                 "id": None,
                                 "name": None,
-                                "arguments": "",
+                                "parser": PartialJSONParser(),
                                 "started": False,
+                                "dispatched": False,
                             },
                         )
 
@@ -74,13 +183,11 @@ def stream_text(
                                 and state["name"] is not None
                                 and not state["started"]
                             ):
-                                yield format_sse(
-                                    {
-                                        "type": "tool-input-start",
-                                        "toolCallId": state["id"],
-                                        "toolName": state["name"],
-                                    }
-                                )
+                                yield {
+                                    "type": "tool-input-start",
+                                    "toolCallId": state["id"],
+                                    "toolName": state["name"],
+                                }
                                 state["started"] = True
 
                         function_call = getattr(tool_call_delta, "function", None)
@@ -92,13 +199,11 @@ def stream_text(
                                     and state["name"] is not None
                                     and not state["started"]
                                 ):
-                                    yield format_sse(
-                                        {
-                                            "type": "tool-input-start",
-                                            "toolCallId": state["id"],
-                                            "toolName": state["name"],
-                                        }
-                                    )
+                                    yield {
+                                        "type": "tool-input-start",
+                                        "toolCallId": state["id"],
+                                        "toolName": state["name"],
+                                    }
                                     state["started"] = True
 
                             if function_call.arguments:
@@ -107,107 +212,56 @@ def stream_text(
                                     and state["name"] is not None
                                     and not state["started"]
                                 ):
-                                    yield format_sse(
-                                        {
-                                            "type": "tool-input-start",
-                                            "toolCallId": state["id"],
-                                            "toolName": state["name"],
-                                        }
-                                    )
+                                    yield {
+                                        "type": "tool-input-start",
+                                        "toolCallId": state["id"],
+                                        "toolName": state["name"],
+                                    }
                                     state["started"] = True
 
-                                state["arguments"] += function_call.arguments
+                                progressed = state["parser"].feed(function_call.arguments)
                                 if state["id"] is not None:
-                                    yield format_sse(
-                                        {
-                                            "type": "tool-input-delta",
-                                            "toolCallId": state["id"],
-                                            "inputTextDelta": function_call.arguments,
+                                    yield {
+                                        "type": "tool-input-delta",
+                                        "toolCallId": state["id"],
+                                        "inputTextDelta": function_call.arguments,
+                                    }
+                                    partial = state["parser"].partial() if progressed else None
+                                    if partial is not None and not state["parser"].complete:
+                                        yield {
+                                            "type": "data-tool-input-partial",
+                                            "id": state["id"],
+                                            "data": {
+                                                "toolCallId": state["id"],
+                                                "toolName": state["name"],
+                                                "input": partial,
+                                            },
+                                            "transient": True,
                                         }
-                                    )
+
+                                if early_tool_dispatch and state["parser"].complete and ready(index):
+                                    for part in dispatch(index):
+                                        yield part
 
             if not chunk.choices and chunk.usage is not None:
                 usage_data = chunk.usage
 
         if finish_reason == "stop" and text_started and not text_finished:
-            yield format_sse({"type": "text-end", "id": text_stream_id})
+            yield {"type": "text-end", "id": text_stream_id}
             text_finished = True
 
         if finish_reason == "tool_calls":
-            for index in sorted(tool_calls_state.keys()):
-                state = tool_calls_state[index]
-                tool_call_id = state.get("id")
-                tool_name = state.get("name")
-
-                if tool_call_id is None or tool_name is None:
-                    continue
-
-                if not state["started"]:
-                    yield format_sse(
-                        {
-                            "type": "tool-input-start",
-                            "toolCallId": tool_call_id,
-                            "toolName": tool_name,
-                        }
-                    )
-                    state["started"] = True
-
-                raw_arguments = state["arguments"]
-                try:
-                    parsed_arguments = json.loads(raw_arguments) if raw_arguments else {}
-                except Exception as error:
-                    yield format_sse(
-                        {
-                            "type": "tool-input-error",
-                            "toolCallId": tool_call_id,
-                            "toolName": tool_name,
-                            "input": raw_arguments,
-                            "errorText": str(error),
-                        }
-                    )
-                    continue
-
-                yield format_sse(
-                    {
-                        "type": "tool-input-available",
-                        "toolCallId": tool_call_id,
-                        "toolName": tool_name,
-                        "input": parsed_arguments,
-                    }
-                )
+            for index in sorted(tool_calls_state):
+                if ready(index):
+                    for part in dispatch(index):
+                        yield part
 
-                tool_function = available_tools.get(tool_name)
-                if tool_function is None:
-                    yield format_sse(
-                        {
-                            "type": "tool-output-error",
-                            "toolCallId": tool_call_id,
-                            "errorText": f"Tool '{tool_name}' not found.",
-                        }
-                    )
-                    continue
-
-                try:
-                    tool_result = tool_function(**parsed_arguments)
-                except Exception as error:
-                    yield format_sse(
-                        {
-                            "type": "tool-output-error",
-                            "toolCallId": tool_call_id,
-                            "errorText": str(error),
-                        }
-                    )
-                else:
-                    yield format_sse(
-                        {
-                            "type": "tool-output-available",
-                            "toolCallId": tool_call_id,
-                            "output": tool_result,
-                        }
-                    )
+        for index in sorted(tool_tasks):
+            await asyncio.wait({tool_tasks[index]})
+            yield tool_output(index)
 
         if text_started and not text_finished:
-            yield format_sse({"type": "text-end", "id": text_stream_id})
+            yield {"type": "text-end", "id": text_stream_id}
             text_finished = True
 
         finish_metadata: Dict[str, Any] = {}
@@ -225,14 +279,212 @@ def stream_text(
             finish_metadata["usage"] = usage_payload
 
         if finish_metadata:
-            yield format_sse({"type": "finish", "messageMetadata": finish_metadata})
+            yield {"type": "finish", "messageMetadata": finish_metadata}
         else:
-            yield format_sse({"type": "finish"})
+            yield {"type": "finish"}
 
-        yield "data: [DONE]\n\n"
     except Exception:
         traceback.print_exc()
         raise
+    finally:
+        # Runs on normal completion, on disconnect and when Starlette cancels
+        # the response task: closing the HTTP stream aborts the upstream request.
+        if stream is not None:
+            await stream.close()
+        for task in tool_tasks.values():
+            task.cancel()
+
+
+class DeltaCoalescing(BaseModel):
+    """Merge consecutive delta parts into fewer SSE frames.
+
+    Buffered ``text-delta`` / ``tool-input-delta`` text is flushed after
+    ``window_ms`` or once it reaches ``max_bytes``, and before any other part.
+    The first delta of each text or tool-input stream is sent on its own so
+    time to first token is unchanged.
+    """
+
+    window_ms: float = 15.0
+    max_bytes: int = 2048
+
+
+_DELTA_FIELDS = {"text-delta": ("id", "delta"), "tool-input-delta": ("toolCallId", "inputTextDelta")}
+
+
+class _Coalescer:
+    def __init__(self, options: DeltaCoalescing):
+        self.window = options.window_ms / 1000
+        self.max_bytes = options.max_bytes
+        self.pending: Optional[Dict[str, Any]] = None
+        self.pending_bytes = 0
+        self.deadline: Optional[float] = None
+        self.seen: set = set()
+
+    def push(self, part: Dict[str, Any]) -> list:
+        fields = _DELTA_FIELDS.get(part["type"])
+        if fields is None:
+            return self.flush() + [part]
+        id_field, text_field = fields
+        stream_key = (part["type"], part[id_field])
+        if stream_key not in self.seen:
+            self.seen.add(stream_key)
+            return self.flush() + [part]
+
+        frames = []
+        if self.pending is not None and (self.pending["type"], self.pending[id_field]) != stream_key:
+            frames = self.flush()
+        if self.pending is None:
+            self.pending = dict(part)
+            self.pending_bytes = 0
+            self.deadline = time.monotonic() + self.window
+        else:
+            self.pending[text_field] += part[text_field]
+        self.pending_bytes += len(part[text_field].encode())
+        if self.pending_bytes >= self.max_bytes:
+            frames += self.flush()
+        return frames
+
+    def flush(self) -> list:
+        if self.pending is None:
+            return []
+        part, self.pending, self.deadline = self.pending, None, None
+        return [part]
+
+
+async def stream_text(
+    client: AsyncOpenAI,
+    messages: Sequence[ChatCompletionMessageParam],
+    tool_definitions: Sequence[Dict[str, Any]],
+    available_tools: Tools,
+    protocol: str = "data",
+    request: Optional[Request] = None,
+    model: str = "gpt-4o",
+    coalesce: Optional[DeltaCoalescing] = None,
+    early_tool_dispatch: bool = True,
+):
+    """Yield Server-Sent Events for a streaming chat completion.
+
+    Runs on the event loop, so an open stream costs a socket rather than a
+    worker thread. When ``request`` is given, the client is polled for a
+    disconnect and the upstream completion is closed as soon as it goes
+    away, which stops token generation (and billing) for abandoned chats.
+    With ``coalesce``, runs of token deltas are merged into fewer frames.
+    """
+    parts = _completion_parts(
+        client, messages, tool_definitions, available_tools, request, model, early_tool_dispatch
+    )
+    if coalesce is None:
+        async for part in parts:
+            yield format_sse(part)
+        yield "data: [DONE]\n\n"
+        return
+
+    coalescer = _Coalescer(coalesce)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+    end = object()
+
+    async def produce() -> None:
+        try:
+            async for part in parts:
+                await queue.put(part)
+            await queue.put(end)
+        except Exception as error:
+            await queue.put(error)
+
+    producer = asyncio.create_task(produce())
+    try:
+        finished = False
+        while not finished:
+            if coalescer.deadline is None:
+                item = await queue.get()
+            else:
+                try:
+                    item = await asyncio.wait_for(
+                        queue.get(), timeout=max(0.0, coalescer.deadline - time.monotonic())
+                    )
+                except asyncio.TimeoutError:
+                    # Window elapsed while waiting on the provider: send what we have.
+                    for part in coalescer.flush():
+                        yield format_sse(part)
+                    continue
+
+            # Take everything that arrived in the same burst without waiting.
+            batch = [item]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+
+            frames = []
+            error = None
+            for item in batch:
+                if item is end or isinstance(item, Exception):
+                    finished = True
+                    error = item if item is not end else None
+                    break
+                frames += coalescer.push(item)
+            if finished:
+                frames += coalescer.flush()
+            if frames:
+                yield "".join(format_sse(frame) for frame in frames)
+            if error is not None:
+                raise error
+        yield "data: [DONE]\n\n"
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+        await parts.aclose()
+
+
+async def stream_agent_events(events: AsyncIterator[Dict[str, Any]]):
+    """Yield Server-Sent Events for the progress events of an agent task.
+
+    Intermediate events become ``data-<type>`` parts; the final ``result``
+    event is rendered as the assistant's text reply.
+    """
+    message_id = f"msg-{uuid.uuid4().hex}"
+    text_stream_id = "text-1"
+
+    yield format_sse({"type": "start", "messageId": message_id})
+
+    try:
+        async for event in events:
+            data = {
+                key: value.model_dump() if isinstance(value, BaseModel) else value
+                for key, value in event.items()
+                if key != "type"
+            }
+
+            if event["type"] != "result":
+                yield format_sse({"type": f"data-{event['type']}", "data": data})
+                continue
+
+            result = event["result"]
+            if result.success:
+                text = (
+                    f"✅ Task completed successfully!\n\n**Result:**\n{result.stdout or 'No output'}"
+                    "\n\n*Executed via autonomous agent with safety guardrails*"
+                )
+            else:
+                text = (
+                    f"❌ Task failed.\n\n**Error:** {result.stderr or 'Unknown error'}"
+                    "\n\n*The agent encountered an issue while executing this task.*"
+                )
+
+            yield format_sse({"type": "data-result", "data": data})
+            yield format_sse({"type": "text-start", "id": text_stream_id})
+            yield format_sse({"type": "text-delta", "id": text_stream_id, "delta": text})
+            yield format_sse({"type": "text-end", "id": text_stream_id})
+    except Exception as error:
+        logger.exception("Agent task failed while streaming")
+        yield format_sse({"type": "error", "errorText": str(error)})
+    finally:
+        # On disconnect this generator is closed; close the agent's too so it
+        # cancels the running plan instead of continuing unobserved.
+        aclose = getattr(events, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    yield format_sse({"type": "finish"})
+    yield "data: [DONE]\n\n"
 
 
 def patch_response_with_headers(
@@ -1,13 +1,58 @@
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
 import requests
+from requests.adapters import HTTPAdapter
 
+if TYPE_CHECKING:
+    from cline_agent.tools.runtime import ToolRuntime
 
-def get_current_weather(latitude, longitude):
-    # Format the URL with proper parameter substitution
-    url = f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&current=temperature_2m&hourly=temperature_2m&daily=sunrise,sunset&timezone=auto"
+WEATHER_API_BASE_URL = os.getenv("WEATHER_API_BASE_URL", "https://api.open-meteo.com/v1").rstrip("/")
+WEATHER_TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", "10"))
+# Forecasts barely change over minutes or across a ~1 km grid cell.
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_GRID_DEGREES = float(os.getenv("WEATHER_GRID_DEGREES", "0.01"))
+
+# One keep-alive connection pool for every weather lookup in the worker.
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+WEATHER_CACHE_MAX_ENTRIES = 1024
+
+_cache: Dict[Tuple[float, float], Tuple[float, Any]] = {}
+_inflight: Dict[Tuple[float, float], "_Flight"] = {}
+_lock = threading.Lock()
+
+
+class _Flight:
+    """One in-progress upstream lookup that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+
+
+def _snap(value: float) -> float:
+    grid = WEATHER_GRID_DEGREES
+    return round(round(float(value) / grid) * grid, 6) if grid > 0 else float(value)
+
+
+def _fetch_weather(latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+    url = f"{WEATHER_API_BASE_URL}/forecast"
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "current": "temperature_2m",
+        "hourly": "temperature_2m",
+        "daily": "sunrise,sunset",
+        "timezone": "auto",
+    }
 
     try:
-        # Make the API call
-        response = requests.get(url)
+        response = _session.get(url, params=params, timeout=WEATHER_TIMEOUT)
 
         # Raise an exception for bad status codes
         response.raise_for_status()
@@ -21,6 +66,43 @@ def get_current_weather(latitude, longitude):
         return None
 
 
+def get_current_weather(latitude, longitude):
+    """Forecast for the grid cell containing (latitude, longitude).
+
+    Results are cached for ``WEATHER_CACHE_TTL`` seconds. Concurrent lookups
+    of the same cell share a single upstream request; failures are not cached.
+    """
+    key = (_snap(latitude), _snap(longitude))
+
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+
+    if not leader:
+        flight.done.wait()
+        return flight.result
+
+    try:
+        flight.result = _fetch_weather(*key)
+        if flight.result is not None:
+            with _lock:
+                _cache.pop(key, None)
+                _cache[key] = (time.monotonic() + WEATHER_CACHE_TTL, flight.result)
+                while len(_cache) > WEATHER_CACHE_MAX_ENTRIES:
+                    # Dicts keep insertion order, so this drops the oldest entry.
+                    del _cache[next(iter(_cache))]
+        return flight.result
+    finally:
+        with _lock:
+            del _inflight[key]
+        flight.done.set()
+
+
 TOOL_DEFINITIONS = [{
     "type": "function",
     "function": {
@@ -47,3 +129,30 @@ TOOL_DEFINITIONS = [{
 AVAILABLE_TOOLS = {
     "get_current_weather": get_current_weather,
 }
+
+
+_runtime: Optional["ToolRuntime"] = None
+
+
+def get_tool_runtime() -> "ToolRuntime":
+    """Runtime running the tools above for stream_text with deadlines,
+    concurrency bounds and output caps; its metrics() report per-tool
+    latency and errors.
+
+    Built on first use: ``cline_agent`` is only importable once
+    ``api/index.py`` has put ``backend/`` on ``sys.path``.
+    """
+    global _runtime
+    with _lock:
+        if _runtime is None:
+            from cline_agent.tools.runtime import ToolRuntime
+
+            _runtime = ToolRuntime(max_workers=int(os.getenv("CHAT_TOOL_WORKERS", "16")))
+            _runtime.register(
+                "get_current_weather",
+                get_current_weather,
+                timeout=WEATHER_TIMEOUT + 5,
+                max_concurrency=16,
+                max_output_bytes=64 * 1024,
+            )
+        return _runtime
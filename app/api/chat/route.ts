@@ -25,35 +25,32 @@ export async function POST(req: NextRequest) {
         : 'http://localhost:8000'
       : 'http://localhost:8000';
 
-    // Call the FastAPI backend
-    const response = await fetch(`${backendUrl}/api/run-task`, {
+    // Call the FastAPI backend and relay its progress events as they arrive
+    const response = await fetch(`${backendUrl}/api/run-task/stream`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({
         task,
         mode: 'plan_act'  // Use plan_act mode for better structured execution
-      })
+      }),
+      signal: req.signal,
     });
 
-    if (!response.ok) {
+    if (!response.ok || !response.body) {
       const errorText = await response.text();
       throw new Error(`Backend error: ${response.status} ${errorText}`);
     }
 
-    const result = await response.json();
-
-    // Transform structured result into conversational message
-    let content = '';
-    if (result.success) {
-      content = `✅ Task completed successfully!\n\n**Result:**\n${result.stdout || 'No output'}\n\n*Executed via autonomous agent with safety guardrails*`;
-    } else {
-      content = `❌ Task failed.\n\n**Error:** ${result.stderr || 'Unknown error'}\n\n*The agent encountered an issue while executing this task.*`;
-    }
-
-    return NextResponse.json({
-      id: Date.now().toString(),
-      role: 'assistant',
-      content
+    // The backend already emits the UI message stream protocol (plan, step,
+    // reflection and result parts), so the body is passed through unbuffered.
+    return new Response(response.body, {
+      headers: {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive',
+        'X-Accel-Buffering': 'no',
+        'x-vercel-ai-ui-message-stream': 'v1',
+      },
     });
 
   } catch (error: any) {
@@ -1,18 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import structlog
 import json
-from typing import Any
+from typing import Any, AsyncIterator, List
 
 from ..config import load_config
 from ..logging_config import setup_logging
 from ..llm.providers import LLMRouter
+from ..cache.plan_cache import PlanCache
 from ..tools.schemas import Plan, PlanStep, ExecutionResult
-from ..tools.file_system import FileSystemTool
-from ..tools.git_tool import GitTool
-from ..tools.mcp_client import MCPClient
+from ..tools.file_system import AsyncFileSystemTool
+from ..tools.git_tool import AsyncGitTool
+from ..tools.mcp_client import AsyncMCPClient
 from ..tools.safety_auditor import SafetyAuditor
 from ..tools.reflection_auditor import ReflectionAuditor
+from ..tools.runtime import ToolRuntime
+from .executor import EventCallback, PlanExecutor, StepMemo
 
 log = structlog.get_logger(__name__)
 
@@ -21,62 +26,133 @@ PLAN_SYSTEM = """You are an autonomous developer agent.
 Produce a JSON plan that satisfies the user request.
 Each step must use EXACTLY one tool: "file_system", "git", or "mcp".
 Allowed commands:
-  file_system.[read|write|list_dir]
-  git.[status|add|commit]
+  file_system.[read|write|read_many|write_many|list_dir|tree|glob|search]
+    read takes a path and optional selectors to read only part of a large file:
+    "lines=START:END" (1-based, inclusive) and/or "bytes=OFFSET:LENGTH"
+    tree takes a directory and an optional depth (default "3"); glob takes a
+    pattern such as "src/**/*.py"
+    search finds text in files: args are a regex, an optional directory, then
+    options "literal", "ignore_case", "glob=*.py", "max=N"; use it instead of
+    reading files one by one to locate code
+    read_many takes several paths; write_many takes path, content, path,
+    content, ... pairs; prefer them over many single read/write steps
+  git.[status|add|commit|diff|log]
+    add takes one or more paths; diff takes optional "staged", "stat" and
+    paths; log takes optional "max=N" (default 20) and paths
   mcp.[invoke]
 Return JSON matching the schema: {"steps": [{"tool": str, "command": str, "args": list[str]}]}"""
 
-EXEC_SYSTEM = """You are an autonomous developer agent.
-Execute the provided JSON plan step-by-step and return a JSON summary:
-{"success": bool, "stdout": str|None, "stderr": str|None}"""
 
+class AsyncAgent:
+    """Plan → execute → reflect pipeline; every LLM and tool call is awaited."""
 
-class Agent:
-    def __init__(self, config: dict | None = None):
+    def __init__(
+        self,
+        config: dict | None = None,
+        router: LLMRouter | None = None,
+        plan_cache: PlanCache | None = None,
+    ):
+        """Build an agent; pass a shared ``router`` to reuse warm LLM clients.
+
+        Logging is only configured when the agent owns its router, since a
+        shared router implies the owner (e.g. ``AgentPool``) already did it.
+        Likewise the plan cache is built from config unless one is shared.
+        """
         self.cfg = config or load_config()
-        setup_logging(self.cfg["logging"]["level"], self.cfg["logging"]["renderer"])
-        self.router = LLMRouter(self.cfg)
-        self.fs = FileSystemTool(self.cfg["project_root"])
-        self.git = GitTool(self.cfg["project_root"])
-        self.mcp = MCPClient(self.cfg.get("mcp_server_url", "http://localhost:8000"))
+        if router is None:
+            setup_logging(self.cfg["logging"]["level"], self.cfg["logging"]["renderer"])
+            router = LLMRouter(self.cfg)
+            plan_cache = plan_cache or PlanCache.from_config(self.cfg)
+        self.router = router
+        self.plan_cache = plan_cache
+        fs_cfg = self.cfg.get("file_system", {})
+        self.fs = AsyncFileSystemTool(
+            self.cfg["project_root"],
+            max_read_bytes=fs_cfg.get("max_read_bytes", 64 * 1024),
+            mmap_threshold=fs_cfg.get("mmap_threshold", 1024 * 1024),
+            fsync=fs_cfg.get("fsync", True),
+            batch_concurrency=fs_cfg.get("batch_concurrency", 16),
+        )
+        self.git = AsyncGitTool(
+            self.cfg["project_root"],
+            index=self.fs.index,
+            max_output_bytes=self.cfg.get("tools", {}).get("git", {}).get("max_output_bytes", 256 * 1024),
+        )
+        self.mcp = AsyncMCPClient(self.cfg.get("mcp_server_url", "http://localhost:8000"), **self.cfg.get("mcp", {}))
         self.safety = SafetyAuditor()
-        self.reflection = ReflectionAuditor(self.router)
+        self.reflection = ReflectionAuditor(self.router, **self.cfg.get("reflection", {}))
+        self.tools = self._build_tool_runtime()
+        self.executor = PlanExecutor(
+            self.run_tool,
+            max_concurrency=self.cfg.get("executor", {}).get("max_concurrency", 4),
+            run_batch=self.run_tools_batch,
+        )
+
+    def _build_tool_runtime(self) -> ToolRuntime:
+        """Register the plan tools with their configured timeouts and limits."""
+        tools_cfg = self.cfg.get("tools", {})
+        runtime = ToolRuntime(max_workers=tools_cfg.get("max_workers", 8))
+        targets = {
+            "file_system": functools.partial(self._invoke, self.fs),
+            "git": functools.partial(self._invoke, self.git),
+            "mcp": self._invoke_mcp,
+        }
+        for name, fn in targets.items():
+            runtime.register(name, fn, is_async=True, **tools_cfg.get(name, {}))
+        runtime.register("mcp_batch", self._invoke_mcp_batch, is_async=True, **tools_cfg.get("mcp", {}))
+        return runtime
+
+    @staticmethod
+    async def _invoke(tool: Any, command: str, *args: str) -> Any:
+        return await getattr(tool, command)(*args)
+
+    async def _invoke_mcp(self, command: str, *args: str) -> Any:
+        return await self.mcp.invoke("shadcn", command, {"args": list(args)})
+
+    async def _invoke_mcp_batch(self, steps: List[PlanStep]) -> List[Any]:
+        return await self.mcp.invoke_many([("shadcn", s.command, {"args": list(s.args)}) for s in steps])
+
+    async def run_tools_batch(self, steps: List[PlanStep]) -> List[Any]:
+        """Run consecutive MCP steps as one batch; one result (or exception) per step."""
+        return await self.tools.call("mcp_batch", steps)
+
+    async def aclose(self) -> None:
+        """Finish shadow critiques and release the MCP connection pool (the router is closed by its owner)."""
+        await self.reflection.aclose()
+        await self.mcp.aclose()
+        self.tools.close()
 
     # ---------- high-level API ----------
-    def plan(self, task: str) -> Plan:
+    async def plan(self, task: str) -> Plan:
         client = self.router.for_phase("plan")
-        client.response_model = Plan
         messages = [
             {"role": "system", "content": PLAN_SYSTEM},
             {"role": "user", "content": task},
         ]
         log.debug("agent.plan.request", task=task)
-        return client.generate_structured(messages)
+        return await client.generate_structured(messages, response_model=Plan)
 
-    def execute(self, plan: Plan) -> ExecutionResult:
-        client = self.router.for_phase("execute")
-        client.response_model = ExecutionResult
-        messages = [
-            {"role": "system", "content": EXEC_SYSTEM},
-            {"role": "user", "content": plan.model_dump_json()},
-        ]
+    async def execute(
+        self,
+        plan: Plan,
+        on_event: EventCallback | None = None,
+        memo: StepMemo | None = None,
+    ) -> ExecutionResult:
+        """Run the plan's steps locally, independent steps concurrently."""
         log.debug("agent.execute.request", steps=len(plan.steps))
-        return client.generate_structured(messages)
+        return await self.executor.execute(plan, on_event=on_event, memo=memo)
 
-    def run_tool(self, step: PlanStep) -> dict[str, Any]:
+    async def run_tool(self, step: PlanStep) -> dict[str, Any]:
         """Low-level tool dispatcher."""
-        if step.tool == "file_system":
-            return getattr(self.fs, step.command)(*step.args)
-        if step.tool == "git":
-            return getattr(self.git, step.command)(*step.args)
-        if step.tool == "mcp":
-            return self.mcp.invoke("shadcn", step.command, {"args": step.args})
-        raise ValueError(f"Unknown tool: {step.tool}")
+        if step.command.startswith("_"):
+            raise ValueError(f"Unknown command: {step.tool}.{step.command}")
+        if step.tool not in self.tools:
+            raise ValueError(f"Unknown tool: {step.tool}")
+        return await self.tools.call(step.tool, step.command, *step.args)
 
-    def refine_plan(self, task: str, current_plan: Plan, feedback: str) -> Plan:
+    async def refine_plan(self, task: str, current_plan: Plan, feedback: str) -> Plan:
         """Refine the current plan based on user feedback."""
         client = self.router.for_phase("plan")
-        client.response_model = Plan
         messages = [
             {"role": "system", "content": PLAN_SYSTEM},
             {"role": "user", "content": task},
@@ -84,42 +160,139 @@ class Agent:
             {"role": "user", "content": f"Please revise the plan: {feedback}"},
         ]
         log.debug("agent.refine_plan.request", task=task, feedback=feedback)
-        return client.generate_structured(messages)
+        return await client.generate_structured(messages, response_model=Plan)
 
-    def run_task(self, task: str, mode: str = "plan_act") -> ExecutionResult:
+    async def run_task(self, task: str, mode: str = "plan_act") -> ExecutionResult:
         """Plan → execute with safety + reflection loop."""
-        for attempt in range(3):
-            plan = self.plan(task)
-
-            # ---------- safety audit ----------
-            plan_json = plan.model_dump_json()
-            safe, reasons = self.safety.audit(plan_json)
-            if not safe:
-                log.warning("plan.blocked", reasons=reasons)
-                error_msg = f"🚫 Safety violation blocked execution:\n{chr(10).join(f'• {reason}' for reason in reasons)}"
-                return ExecutionResult(success=False, stderr=error_msg)
-
-            # ---------- execute ----------
-            result = self.execute(plan)
-
-            # ---------- reflection ----------
-            ok, retry, notes = self.reflection.critique(task, plan_json, result)
-            log.info("reflection.complete", ok=ok, retry=retry, notes=notes)
-            if ok or not retry:
-                # Format successful result for conversational output
-                if result.success:
-                    formatted_output = self._format_success_output(task, plan, result)
-                    return ExecutionResult(success=True, stdout=formatted_output, stderr=result.stderr)
+        result = None
+        async for event in self.run_task_events(task, mode=mode):
+            if event["type"] == "result":
+                result = event["result"]
+        return result
+
+    async def run_task_events(
+        self, task: str, mode: str = "plan_act"
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Run the task loop, yielding an event as soon as each phase finishes.
+
+        Retries refine the previous plan with the reflection notes instead of
+        planning from scratch, and steps that already succeeded with unchanged
+        inputs are not run again.
+
+        Event types, in order: ``plan``, ``safety``, ``step-start`` /
+        ``step-finish`` per step, ``execution``, ``reflection``, ``lint`` (when
+        the plan wrote Python files) and ``retry`` per attempt, then exactly
+        one ``result``.
+        """
+        cache_key = None
+        if self.plan_cache is not None:
+            cache_key = await asyncio.to_thread(
+                lambda: self.plan_cache.key(task, self.cfg["project_root"], self.fs.index.fingerprint())
+            )
+
+        memo = StepMemo()
+        plan = feedback = None
+        execution: asyncio.Task | None = None
+        lint: asyncio.Future | None = None
+        try:
+            for attempt in range(3):
+                # ---------- plan (a cached plan skips the LLM round trip) ----------
+                cached = False
+                if feedback is not None:
+                    plan = await self.refine_plan(task, plan, feedback)
                 else:
-                    # Format error result
-                    formatted_error = self._format_error_output(task, result)
-                    return ExecutionResult(success=False, stdout=result.stdout, stderr=formatted_error)
+                    plan = await self.plan_cache.aget(cache_key) if cache_key else None
+                    cached = plan is not None
+                    if plan is None:
+                        plan = await self.plan(task)
+                yield {
+                    "type": "plan",
+                    "attempt": attempt + 1,
+                    "plan": plan,
+                    "cached": cached,
+                    "refined": feedback is not None,
+                }
+
+                # ---------- safety audit ----------
+                plan_json = plan.model_dump_json()
+                safe, reasons = await asyncio.to_thread(self.safety.audit_plan, plan)
+                yield {"type": "safety", "safe": safe, "reasons": reasons}
+                if not safe:
+                    log.warning("plan.blocked", reasons=reasons)
+                    error_msg = f"🚫 Safety violation blocked execution:\n{chr(10).join(f'• {reason}' for reason in reasons)}"
+                    yield {"type": "result", "result": ExecutionResult(success=False, stderr=error_msg)}
+                    return
 
-            log.info("reflection.retry", attempt=attempt + 1)
+                # ---------- execute ----------
+                events: asyncio.Queue = asyncio.Queue()
+                execution = asyncio.create_task(self.execute(plan, on_event=events.put_nowait, memo=memo))
+                execution.add_done_callback(lambda _: events.put_nowait(None))
+                while (event := await events.get()) is not None:
+                    yield event
+                result = execution.result()
+                yield {"type": "execution", "result": result}
 
-        # All attempts failed
-        error_msg = f"❌ Task failed after {attempt + 1} attempts. The agent was unable to complete '{task}' successfully."
-        return ExecutionResult(success=False, stderr=error_msg)
+                # ---------- reflection (written files are linted meanwhile) ----------
+                lint = None
+                if self.cfg.get("lint", {}).get("enabled", True):
+                    lint = asyncio.ensure_future(
+                        asyncio.to_thread(self.safety.lint_plan, plan, self.cfg["project_root"], result)
+                    )
+                ok, retry, notes = await self.reflection.critique(task, plan_json, result)
+                log.info("reflection.complete", ok=ok, retry=retry, notes=notes)
+                yield {"type": "reflection", "ok": ok, "retry": retry, "notes": notes}
+                report = await lint if lint is not None else None
+                if report and report["files"]:
+                    yield {"type": "lint", **report}
+                if cache_key:
+                    if ok and result.success and not cached:
+                        await self.plan_cache.aput(cache_key, plan)
+                    elif cached and not (ok and result.success):
+                        await self.plan_cache.ainvalidate(cache_key)
+                if ok or not retry:
+                    # Format successful result for conversational output
+                    if result.success:
+                        formatted_output = self._format_success_output(task, plan, result)
+                        final = ExecutionResult(success=True, stdout=formatted_output, stderr=result.stderr)
+                    else:
+                        # Format error result
+                        formatted_error = self._format_error_output(task, result)
+                        final = ExecutionResult(success=False, stdout=result.stdout, stderr=formatted_error)
+                    yield {"type": "result", "result": final}
+                    return
+
+                log.info("reflection.retry", attempt=attempt + 1)
+                yield {"type": "retry", "attempt": attempt + 1, "notes": notes}
+                feedback = self._retry_feedback(notes, result, report)
+
+            # All attempts failed
+            error_msg = f"❌ Task failed after {attempt + 1} attempts. The agent was unable to complete '{task}' successfully."
+            yield {"type": "result", "result": ExecutionResult(success=False, stderr=error_msg)}
+        finally:
+            # Also reached when the consumer disconnects (aclose): stop the plan
+            # and the linter instead of letting them run on unobserved.
+            pending = [t for t in (execution, lint) if t is not None and not t.done()]
+            for t in pending:
+                t.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    @staticmethod
+    def _retry_feedback(notes: str, result: ExecutionResult, lint: dict[str, Any] | None = None) -> str:
+        """Reflection notes plus the failing steps and lint issues, for refine_plan."""
+        lines = [notes or "The previous attempt did not achieve the task."]
+        failures = [s for s in result.steps if not s.success and not s.skipped]
+        if failures:
+            lines.append("Failed steps (successful steps will not be re-run if kept unchanged):")
+            for s in failures:
+                lines.append(f"- step {s.index + 1} {s.tool}.{s.command}{tuple(s.args)}: {s.stderr}")
+        issues = [issue for found in (lint or {}).get("files", {}).values() for issue in found]
+        if issues:
+            lines.append("Lint issues in files written by the plan:")
+            lines.extend(f"- {issue}" for issue in issues[:20])
+            if len(issues) > 20:
+                lines.append(f"- … {len(issues) - 20} more")
+        return "\n".join(lines)
 
     def _format_success_output(self, task: str, plan: Plan, result: ExecutionResult) -> str:
         """Format successful execution results for conversational display."""
@@ -173,3 +346,39 @@ class Agent:
         output_lines.append("*The autonomous agent encountered an issue. Try rephrasing your request or breaking it into smaller steps.*")
 
         return "\n".join(output_lines)
+
+
+class Agent:
+    """Synchronous facade over :class:`AsyncAgent` for the Typer CLI.
+
+    All calls run on one private event loop so the async HTTP clients keep
+    their connection pools between calls.
+    """
+
+    def __init__(self, config: dict | None = None):
+        self._loop = asyncio.new_event_loop()
+        self._agent = AsyncAgent(config)
+        self.cfg = self._agent.cfg
+
+    def _run(self, coro):
+        return self._loop.run_until_complete(coro)
+
+    def plan(self, task: str) -> Plan:
+        return self._run(self._agent.plan(task))
+
+    def execute(self, plan: Plan) -> ExecutionResult:
+        return self._run(self._agent.execute(plan))
+
+    def run_tool(self, step: PlanStep) -> dict[str, Any]:
+        return self._run(self._agent.run_tool(step))
+
+    def refine_plan(self, task: str, current_plan: Plan, feedback: str) -> Plan:
+        return self._run(self._agent.refine_plan(task, current_plan, feedback))
+
+    def run_task(self, task: str, mode: str = "plan_act") -> ExecutionResult:
+        return self._run(self._agent.run_task(task, mode=mode))
+
+    def close(self) -> None:
+        self._run(self._agent.aclose())
+        self._run(self._agent.router.aclose())
+        self._loop.close()
@@ -0,0 +1,366 @@
+"""Local plan executor: runs PlanStep tools directly, in parallel where safe."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import posixpath
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import structlog
+
+from ..tools.schemas import ExecutionResult, Plan, PlanStep, StepResult
+
+log = structlog.get_logger(__name__)
+
+# Resources a step touches. Paths are normalised and relative to project_root
+# ("" is the whole tree); names starting with "@" are non-path resources.
+WORKSPACE = ""
+GIT_INDEX = "@git"
+BARRIER: Set[str] = {WORKSPACE, GIT_INDEX, "@mcp"}
+
+EventCallback = Callable[[Dict[str, Any]], None]
+BatchRunner = Callable[[List[PlanStep]], Awaitable[List[Any]]]
+
+
+def _norm(path: str) -> str:
+    path = posixpath.normpath(path.replace("\\", "/")).lstrip("/")
+    return "" if path == "." else path
+
+
+def _overlaps(a: str, b: str) -> bool:
+    if a.startswith("@") or b.startswith("@"):
+        return a == b
+    return a == b or not a or not b or b.startswith(a + "/") or a.startswith(b + "/")
+
+
+def step_footprint(step: PlanStep) -> Tuple[Set[str], Set[str]]:
+    """Return the (reads, writes) resource sets of a step.
+
+    Unknown commands are treated as barriers that conflict with everything.
+    """
+    args = step.args
+    first = _norm(args[0]) if args else WORKSPACE
+    key = f"{step.tool}.{step.command}"
+
+    if key == "file_system.read":
+        return {first}, set()
+    if key in ("file_system.list_dir", "file_system.tree"):
+        return {first}, set()
+    if key == "file_system.search":
+        # args: pattern, then an optional directory
+        return {_norm(args[1]) if len(args) > 1 else WORKSPACE}, set()
+    if key == "file_system.glob":
+        return {WORKSPACE}, set()
+    if key == "file_system.write":
+        return set(), {first}
+    if key == "file_system.read_many":
+        return {_norm(a) for a in args} or {WORKSPACE}, set()
+    if key == "file_system.write_many":
+        return set(), {_norm(a) for a in args[::2]} or {WORKSPACE}
+    if key == "git.status":
+        return {WORKSPACE, GIT_INDEX}, set()
+    if key == "git.add":
+        return {_norm(a) for a in args} or {WORKSPACE}, {GIT_INDEX}
+    if key == "git.diff":
+        paths = {_norm(a) for a in args if a not in ("staged", "stat")}
+        return (paths or {WORKSPACE}) | {GIT_INDEX}, set()
+    if key == "git.log":
+        return {GIT_INDEX}, set()
+    if key == "git.commit":
+        return {GIT_INDEX}, {GIT_INDEX}
+    return set(), set(BARRIER)
+
+
+def _conflicts(a: Tuple[Set[str], Set[str]], b: Tuple[Set[str], Set[str]]) -> bool:
+    reads_a, writes_a = a
+    reads_b, writes_b = b
+    return any(_overlaps(w, r) for w in writes_a for r in reads_b | writes_b) or any(
+        _overlaps(w, r) for w in writes_b for r in reads_a
+    )
+
+
+def plan_dependencies(plan: Plan) -> List[List[int]]:
+    """For each step, the indices of earlier steps it must wait for."""
+    footprints = [step_footprint(step) for step in plan.steps]
+    return [
+        [i for i in range(j) if _conflicts(footprints[i], footprints[j])]
+        for j in range(len(footprints))
+    ]
+
+
+def batch_runs(plan: Plan, tools: Set[str]) -> Dict[int, List[int]]:
+    """Map every step in a run of two or more consecutive ``tools`` steps to the run."""
+    runs: Dict[int, List[int]] = {}
+    current: List[int] = []
+    for index, step in enumerate([*plan.steps, None]):
+        if step is not None and step.tool in tools:
+            current.append(index)
+            continue
+        if len(current) > 1:
+            runs.update({i: current for i in current})
+        current = []
+    return runs
+
+
+def _normalise_output(output: Any) -> Tuple[bool, Optional[str], Optional[str]]:
+    """Map a tool's return value onto (success, stdout, stderr)."""
+    if isinstance(output, dict) and ("stdout" in output or "stderr" in output or "success" in output):
+        return bool(output.get("success", True)), output.get("stdout"), output.get("stderr")
+    if isinstance(output, str):
+        return True, output, None
+    return True, json.dumps(output), None
+
+
+def _digest(*parts: Any) -> str:
+    raw = json.dumps(parts, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+class _GitModel(NamedTuple):
+    """What the memo knows of the repository: the staged tree and HEAD.
+
+    ``staged`` maps each path passed to ``git.add`` to the versions it was
+    staged at, on top of an unknown ``base``; ``head`` is the (tree, message)
+    of the last commit made by a step, or None.
+    """
+
+    base: str
+    staged: Dict[str, str]
+    head: Optional[Tuple[str, str]]
+
+    @classmethod
+    def unknown(cls) -> "_GitModel":
+        return cls(uuid.uuid4().hex, {}, None)
+
+    def tree(self) -> str:
+        return _digest("tree", self.base, sorted(self.staged.items()))
+
+
+class StepMemo:
+    """Successful step results carried across the attempts of one task.
+
+    Every resource has a version that changes whenever a step writes it. A
+    step's key combines its tool call with the versions of everything it
+    touches, so a result is reused only when the step would see exactly the
+    state it saw before. Writes are versioned by content, which lets a retry
+    skip a ``file_system.write`` whose content is already on disk; likewise
+    ``git.add`` is skipped when it would not change the staged tree and
+    ``git.commit`` when HEAD already holds that tree and message (a second
+    commit would fail with "nothing to commit"). Barrier steps (MCP, unknown
+    commands) are never reused and reset all versions.
+    """
+
+    def __init__(self):
+        self.results: Dict[str, StepResult] = {}
+        self.versions: Dict[str, str] = {}
+        self.git = _GitModel.unknown()
+
+    @staticmethod
+    def _write(versions: Dict[str, str], resource: str, version: str) -> None:
+        for nested in [r for r in versions if r.startswith(resource + "/")]:
+            del versions[nested]
+        versions[resource] = version
+
+    @staticmethod
+    def _stage(git: _GitModel, versions: Dict[str, str], paths: List[str]) -> _GitModel:
+        """The model after ``git add paths`` of the files at their current versions."""
+        staged = dict(git.staged)
+        for path in paths or [WORKSPACE]:
+            if path == WORKSPACE:
+                staged.clear()
+            StepMemo._write(staged, path, _digest(sorted((r, v) for r, v in versions.items() if _overlaps(r, path))))
+        return git._replace(staged=staged)
+
+    def _walk(self, plan: Plan, results: List[StepResult] | None = None) -> List[Optional[str]]:
+        """Compute step keys in plan order; with ``results``, record them and advance versions."""
+        versions = dict(self.versions)
+        git = self.git
+        keys: List[Optional[str]] = []
+        for i, step in enumerate(plan.steps):
+            reads, writes = step_footprint(step)
+            outcome = results[i] if results is not None else None
+            if WORKSPACE in writes:
+                keys.append(None)
+                if outcome is None or not outcome.skipped:
+                    versions = {WORKSPACE: uuid.uuid4().hex}
+                    git = _GitModel.unknown()
+                continue
+
+            touched = reads | writes
+            view = sorted((r, v) for r, v in versions.items() if any(_overlaps(r, t) for t in touched))
+            key = _digest(step.tool, step.command, step.args, view)
+            post = {w: key for w in writes}
+            applied = None
+            after = git
+            name = f"{step.tool}.{step.command}"
+            if name == "file_system.write":
+                (target,) = writes
+                post[target] = _digest("content", target, step.args[1:])
+                applied = "applied:" + post[target]
+                if versions.get(target) == post[target]:
+                    key = applied
+            elif name == "git.add":
+                after = self._stage(git, versions, [_norm(a) for a in step.args])
+                applied = "applied:" + _digest(name, step.args, after.tree())
+                if after.tree() == git.tree():
+                    key = applied
+            elif name == "git.commit":
+                after = git._replace(head=(git.tree(), " ".join(step.args)))
+                applied = "applied:" + _digest(name, after.head)
+                if git.head == after.head:
+                    key = applied
+            if GIT_INDEX in writes:
+                post[GIT_INDEX] = _digest("git", after.tree(), after.head)
+            keys.append(key)
+
+            if outcome is None:
+                git = after
+                for resource, version in post.items():
+                    self._write(versions, resource, version)
+            elif not outcome.skipped:
+                git = after if outcome.success or GIT_INDEX not in writes else _GitModel.unknown()
+                for resource, version in post.items():
+                    self._write(versions, resource, version if outcome.success else uuid.uuid4().hex)
+                if outcome.success:
+                    self.results[key] = outcome
+                    if applied:
+                        self.results[applied] = outcome
+
+        if results is not None:
+            self.versions = versions
+            self.git = git
+        return keys
+
+    def plan_keys(self, plan: Plan) -> List[Optional[str]]:
+        return self._walk(plan)
+
+    def lookup(self, key: Optional[str]) -> Optional[StepResult]:
+        return self.results.get(key) if key else None
+
+    def record(self, plan: Plan, results: List[StepResult]) -> None:
+        self._walk(plan, results)
+
+
+class PlanExecutor:
+    """Execute plan steps through ``run_tool`` on a bounded pool.
+
+    Steps that touch disjoint resources (e.g. reads of different files) run
+    concurrently; conflicting steps (a ``git.add`` after the ``file_system.write``
+    of the same path) wait for their predecessors. A step whose dependency
+    failed is skipped.
+
+    With ``run_batch``, consecutive steps of a ``batch_tools`` tool (MCP by
+    default) are sent together in one call instead of one after another;
+    they no longer wait on each other, only on the steps before the run.
+    """
+
+    def __init__(
+        self,
+        run_tool: Callable[[PlanStep], Awaitable[Any]],
+        max_concurrency: int = 4,
+        run_batch: BatchRunner | None = None,
+        batch_tools: Set[str] | None = None,
+    ):
+        self.run_tool = run_tool
+        self.max_concurrency = max(1, max_concurrency)
+        self.run_batch = run_batch
+        self.batch_tools = {"mcp"} if batch_tools is None else batch_tools
+
+    async def execute(
+        self,
+        plan: Plan,
+        on_event: EventCallback | None = None,
+        memo: StepMemo | None = None,
+    ) -> ExecutionResult:
+        """Run ``plan``; with a ``memo``, steps whose inputs are unchanged since an
+        earlier attempt reuse that attempt's result instead of running again."""
+        deps = plan_dependencies(plan)
+        runs = batch_runs(plan, self.batch_tools) if self.run_batch is not None else {}
+        for index, run_ in runs.items():
+            deps[index] = [i for i in deps[index] if i not in run_]
+        batches: Dict[int, asyncio.Future] = {}
+        keys = memo.plan_keys(plan) if memo is not None else [None] * len(plan.steps)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        t0 = time.perf_counter()
+        tasks: List[asyncio.Task] = []
+
+        async def call(index: int, step: PlanStep) -> Any:
+            run_ = runs.get(index)
+            if run_ is None:
+                return await self.run_tool(step)
+            if run_[0] not in batches:
+                batches[run_[0]] = asyncio.ensure_future(self.run_batch([plan.steps[i] for i in run_]))
+            output = (await asyncio.shield(batches[run_[0]]))[run_.index(index)]
+            if isinstance(output, BaseException):
+                raise output
+            return output
+
+        async def run(index: int, step: PlanStep) -> StepResult:
+            upstream = [await tasks[i] for i in deps[index]]
+            failed = [r.index for r in upstream if not r.success]
+            previous = memo.lookup(keys[index]) if memo is not None and not failed else None
+
+            async with semaphore:
+                started = time.perf_counter()
+                if on_event is not None:
+                    on_event({"type": "step-start", "index": index, "tool": step.tool,
+                              "command": step.command, "args": step.args})
+                if failed:
+                    success, stdout, stderr = False, None, f"Skipped: step {failed[0] + 1} failed"
+                elif previous is not None:
+                    success, stdout, stderr = previous.success, previous.stdout, previous.stderr
+                else:
+                    try:
+                        success, stdout, stderr = _normalise_output(await call(index, step))
+                    except Exception as exc:
+                        log.warning("executor.step.failed", index=index, tool=step.tool,
+                                    command=step.command, error=str(exc))
+                        success, stdout, stderr = False, None, f"{type(exc).__name__}: {exc}"
+                finished = time.perf_counter()
+
+            result = StepResult(
+                index=index,
+                tool=step.tool,
+                command=step.command,
+                args=step.args,
+                success=success,
+                stdout=stdout,
+                stderr=stderr,
+                depends_on=deps[index],
+                skipped=bool(failed),
+                reused=previous is not None,
+                started_ms=round((started - t0) * 1000, 3),
+                duration_ms=round((finished - started) * 1000, 3),
+            )
+            if on_event is not None:
+                on_event({"type": "step-finish", "step": result})
+            return result
+
+        for index, step in enumerate(plan.steps):
+            tasks.append(asyncio.create_task(run(index, step)))
+        steps = list(await asyncio.gather(*tasks))
+        if memo is not None:
+            memo.record(plan, steps)
+
+        duration_ms = round((time.perf_counter() - t0) * 1000, 3)
+        log.info("executor.complete", steps=len(steps), reused=sum(s.reused for s in steps),
+                 duration_ms=duration_ms)
+        return ExecutionResult(
+            success=all(s.success for s in steps),
+            stdout=self._combine(steps, "stdout"),
+            stderr=self._combine(steps, "stderr"),
+            steps=steps,
+            duration_ms=duration_ms,
+        )
+
+    @staticmethod
+    def _combine(steps: List[StepResult], field: str) -> Optional[str]:
+        parts = [(s, getattr(s, field)) for s in steps if getattr(s, field)]
+        if not parts:
+            return None
+        if len(parts) == 1:
+            return parts[0][1]
+        return "\n\n".join(f"[{s.index + 1}] {s.tool}.{s.command}\n{text}" for s, text in parts)
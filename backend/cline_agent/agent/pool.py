@@ -0,0 +1,64 @@
+"""Process-wide pool of warm agents for long-running servers."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict
+
+import structlog
+
+from ..config import load_config
+from ..logging_config import setup_logging
+from ..llm.providers import LLMRouter
+from ..cache.plan_cache import PlanCache
+from .core import AsyncAgent
+
+log = structlog.get_logger(__name__)
+
+
+class AgentPool:
+    """Share one config, logging setup and LLM router across all requests.
+
+    Agents are cached per project root; every agent borrows the pool's router,
+    so provider clients (and their HTTP connection pools) are created once
+    per process instead of once per request.
+    """
+
+    def __init__(self, config: Dict[str, Any] | None = None):
+        self.cfg = config or load_config()
+        setup_logging(self.cfg["logging"]["level"], self.cfg["logging"]["renderer"])
+        self.router = LLMRouter(self.cfg)
+        self.plan_cache = PlanCache.from_config(self.cfg)
+        self._agents: Dict[str, AsyncAgent] = {}
+
+    def get(self, project_root: str | Path | None = None) -> AsyncAgent:
+        """Return the shared agent for ``project_root`` (default: configured root)."""
+        root = str(Path(project_root or self.cfg["project_root"]).resolve())
+        if root not in self._agents:
+            self._agents[root] = AsyncAgent(
+                {**self.cfg, "project_root": root}, router=self.router, plan_cache=self.plan_cache
+            )
+            log.debug("AgentPool agent created", project_root=root)
+        return self._agents[root]
+
+    async def warm(self) -> None:
+        """Build the default agent and pre-open provider connections."""
+        self.get()
+        await self.router.warm()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters for tuning the shared caches."""
+        return {
+            "plan_cache": self.plan_cache.stats() if self.plan_cache else None,
+            "llm_cache": self.router.response_cache.stats() if self.router.response_cache else None,
+            "hedging": self.router.hedge_stats(),
+            "tools": {root: agent.tools.metrics() for root, agent in self._agents.items()},
+            "mcp": {root: dict(agent.mcp.stats) for root, agent in self._agents.items()},
+            "reflection": {root: agent.reflection.stats() for root, agent in self._agents.items()},
+        }
+
+    async def aclose(self) -> None:
+        agents = list(self._agents.values())
+        self._agents.clear()
+        for agent in agents:
+            await agent.aclose()
+        await self.router.aclose()
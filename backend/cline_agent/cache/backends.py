@@ -0,0 +1,237 @@
+"""Key/value cache backends with LRU eviction and TTL expiry."""
+from __future__ import annotations
+
+import asyncio
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+
+log = structlog.get_logger(__name__)
+
+
+DEFAULT_CACHE_PATH = ".cline-agent/cache.sqlite3"
+
+
+class CacheBackend(ABC):
+    """Common interface and hit/miss counters for cache backends.
+
+    The ``a*`` methods are for callers on an event loop; backends that do
+    I/O run the blocking call in a thread.
+    """
+
+    name = "base"
+
+    def __init__(self, max_entries: int = 256, ttl: float | None = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None: ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    async def aget(self, key: str) -> Any | None:
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    async def adelete(self, key: str) -> None:
+        self.delete(key)
+
+    def _expiry(self) -> float | None:
+        return time.time() + self.ttl if self.ttl else None
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU; values are stored as-is (no serialisation)."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 256, ttl: float | None = None):
+        super().__init__(max_entries, ttl)
+        self._data: OrderedDict[str, Tuple[float | None, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (entry[0] is not None and entry[0] < time.time()):
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (self._expiry(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SqliteCache(CacheBackend):
+    """On-disk LRU in a single sqlite table; values are pickled.
+
+    Survives restarts and can be shared by the workers of one host.
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_entries: int = 256,
+        ttl: float | None = None,
+        table: str = "cache",
+    ):
+        super().__init__(max_entries, ttl)
+        self.path = Path(path)
+        if not self.path.parent.exists():
+            self.path.parent.mkdir(parents=True)
+            # Keep the cache out of `git status` when it lives in a project.
+            (self.path.parent / ".gitignore").write_text("*\n")
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed_at)")
+        log.debug("SqliteCache init", path=str(self.path), table=table)
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] < now):
+                if row is not None:
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        try:
+            value = pickle.loads(row[0])
+        except Exception as exc:
+            log.warning("SqliteCache entry unreadable", key=key, error=str(exc))
+            self.delete(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, blob, self._expiry(), time.time()),
+            )
+            overflow = self._count() - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN ("
+                    f"SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    async def aget(self, key: str) -> Any | None:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    async def adelete(self, key: str) -> None:
+        await asyncio.to_thread(self.delete, key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def _count(self) -> int:
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+
+def create_cache(
+    cfg: Dict[str, Any], table: str = "cache", root: str | Path | None = None
+) -> Optional[CacheBackend]:
+    """Build a backend from a cache config section, or None when disabled.
+
+    A relative sqlite ``path`` is resolved against ``root`` (the project
+    root), not the current directory.
+    """
+    if not cfg.get("enabled"):
+        return None
+    max_entries = int(cfg.get("max_entries", 256))
+    ttl = cfg.get("ttl")
+    ttl = float(ttl) if ttl else None
+    if cfg.get("backend", "memory") == "sqlite":
+        path = Path(cfg.get("path") or DEFAULT_CACHE_PATH)
+        if not path.is_absolute() and root is not None:
+            path = Path(root) / path
+        return SqliteCache(path, max_entries, ttl, table=table)
+    return MemoryCache(max_entries, ttl)
@@ -0,0 +1,109 @@
+"""Cache of LLM-generated plans keyed on the task and the workspace state."""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import structlog
+
+from ..tools.schemas import Plan
+from ..tools.workspace_index import SKIP_DIRS
+from .backends import CacheBackend, create_cache
+
+log = structlog.get_logger(__name__)
+
+# Bump when PLAN_SYSTEM or the Plan schema changes so stale on-disk plans are ignored.
+PLAN_CACHE_VERSION = "plan-v1"
+
+
+def normalize_task(task: str) -> str:
+    """Collapse whitespace and trailing punctuation; case is kept (paths are case-sensitive)."""
+    task = unicodedata.normalize("NFC", task)
+    return re.sub(r"\s+", " ", task).strip().rstrip(".!? ")
+
+
+def workspace_fingerprint(root: str | Path, max_entries: int = 5000) -> str:
+    """Cheap fingerprint of ``root``.
+
+    Git repositories use HEAD plus the index file's size and mtime; other
+    trees hash the sizes and mtimes of up to ``max_entries`` files.
+    """
+    root = Path(root)
+    h = hashlib.sha256()
+    git_dir = root / ".git"
+    if git_dir.is_dir():
+        head_file = git_dir / "HEAD"
+        head = head_file.read_text(errors="replace").strip() if head_file.exists() else ""
+        h.update(head.encode())
+        if head.startswith("ref: "):
+            ref = git_dir / head[5:]
+            if ref.exists():
+                h.update(ref.read_bytes())
+        index = git_dir / "index"
+        if index.exists():
+            st = index.stat()
+            h.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+        return "git:" + h.hexdigest()[:32]
+
+    seen = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for name in sorted(filenames):
+            try:
+                st = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            rel = os.path.relpath(os.path.join(dirpath, name), root)
+            h.update(f"{rel}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+            seen += 1
+            if seen >= max_entries:
+                return "tree:" + h.hexdigest()[:32]
+    return "tree:" + h.hexdigest()[:32]
+
+
+class PlanCache:
+    """Plans keyed on (normalized task, project root, workspace fingerprint)."""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> Optional["PlanCache"]:
+        backend = create_cache(cfg.get("cache", {}).get("plan", {}), table="plans", root=cfg.get("project_root"))
+        return cls(backend) if backend is not None else None
+
+    def key(self, task: str, root: str | Path, fingerprint: str | None = None) -> str:
+        """Cache key; callers with a :class:`WorkspaceIndex` pass its fingerprint."""
+        fingerprint = fingerprint or workspace_fingerprint(root)
+        raw = "\0".join([PLAN_CACHE_VERSION, str(root), fingerprint, normalize_task(task)])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Plan]:
+        plan = self.backend.get(key)
+        log.debug("plan_cache.lookup", key=key[:12], hit=plan is not None)
+        return plan
+
+    def put(self, key: str, plan: Plan) -> None:
+        self.backend.set(key, plan)
+
+    def invalidate(self, key: str) -> None:
+        self.backend.delete(key)
+
+    # ---------- async (off the event loop for on-disk backends) ----------
+    async def aget(self, key: str) -> Optional[Plan]:
+        plan = await self.backend.aget(key)
+        log.debug("plan_cache.lookup", key=key[:12], hit=plan is not None)
+        return plan
+
+    async def aput(self, key: str, plan: Plan) -> None:
+        await self.backend.aset(key, plan)
+
+    async def ainvalidate(self, key: str) -> None:
+        await self.backend.adelete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.backend.stats()
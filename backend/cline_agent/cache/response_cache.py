@@ -0,0 +1,81 @@
+"""Exact-match cache of LLM responses."""
+from __future__ import annotations
+
+import hashlib
+import json
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+from .backends import CacheBackend, create_cache
+
+# Set per request (e.g. from the API's ``X-LLM-Cache: bypass`` header) to skip
+# lookups; fresh responses are still stored.
+bypass_response_cache: ContextVar[bool] = ContextVar("bypass_response_cache", default=False)
+
+
+class ResponseCache:
+    """Responses keyed on everything that determines the completion.
+
+    Text calls store the string; structured calls store the validated
+    Pydantic object so a hit skips JSON parsing and validation too.
+    """
+
+    def __init__(self, backend: CacheBackend, phases: Dict[str, bool] | None = None):
+        self.backend = backend
+        self.phases = phases or {}
+        self.bypassed = 0
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> Optional["ResponseCache"]:
+        llm_cfg = cfg.get("cache", {}).get("llm", {})
+        backend = create_cache(llm_cfg, table="responses", root=cfg.get("project_root"))
+        return cls(backend, llm_cfg.get("phases")) if backend is not None else None
+
+    def enabled_for(self, phase: str) -> bool:
+        return self.phases.get(phase, True)
+
+    @staticmethod
+    def key(
+        provider: str,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, Any]] = None,
+        response_model: Optional[Type[BaseModel]] = None,
+    ) -> str:
+        payload = {
+            "provider": provider,
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "response_format": response_format,
+            "schema": f"{response_model.__module__}.{response_model.__qualname__}" if response_model else None,
+        }
+        raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        if bypass_response_cache.get():
+            self.bypassed += 1
+            return None
+        return self.backend.get(key)
+
+    def put(self, key: str, value: Any) -> None:
+        self.backend.set(key, value)
+
+    # ---------- async (off the event loop for on-disk backends) ----------
+    async def aget(self, key: str) -> Any | None:
+        if bypass_response_cache.get():
+            self.bypassed += 1
+            return None
+        return await self.backend.aget(key)
+
+    async def aput(self, key: str, value: Any) -> None:
+        await self.backend.aset(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.backend.stats(), "bypassed": self.bypassed, "phases": self.phases}
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import yaml
 from dotenv import load_dotenv
@@ -20,6 +20,78 @@ def load_config(config_path: str | Path | None = None) -> Dict[str, Any]:
     defaults = {
         "project_root": os.getcwd(),
         "mcp_server_url": os.getenv("MCP_SERVER_URL", "http://localhost:8000"),
+        # MCP HTTP client; HTTP/2 is used when the h2 package is installed
+        "mcp": {
+            "timeout": float(os.getenv("MCP_TIMEOUT", "10")),
+            "retries": int(os.getenv("MCP_RETRIES", "2")),
+            "discover_ttl": float(os.getenv("MCP_DISCOVER_TTL", "300")),
+            "max_connections": int(os.getenv("MCP_MAX_CONNECTIONS", "20")),
+        },
+        "executor": {
+            "max_concurrency": int(os.getenv("AGENT_MAX_CONCURRENCY", "4")),
+        },
+        # Clear-cut outcomes are judged by rules; a share is re-checked by the LLM
+        "reflection": {
+            "fast_path": _env_bool("REFLECTION_FAST_PATH", True),
+            "shadow_rate": float(os.getenv("REFLECTION_SHADOW_RATE", "0.05")),
+        },
+        # ruff over the Python files a plan wrote, alongside reflection
+        "lint": {
+            "enabled": _env_bool("AGENT_LINT", True),
+        },
+        "file_system": {
+            # Larger reads keep only their head and tail
+            "max_read_bytes": int(os.getenv("FS_MAX_READ_BYTES", str(64 * 1024))),
+            # Files at least this large are memory-mapped instead of read whole
+            "mmap_threshold": int(os.getenv("FS_MMAP_THRESHOLD", str(1024 * 1024))),
+            # Writes go through a temp file + rename; fsync makes them durable
+            "fsync": _env_bool("FS_FSYNC", True),
+            # Files read or written at once by read_many / write_many
+            "batch_concurrency": int(os.getenv("FS_BATCH_CONCURRENCY", "16")),
+        },
+        # Per-tool deadlines and limits for plan steps (see tools/runtime.py)
+        "tools": {
+            "max_workers": int(os.getenv("TOOL_MAX_WORKERS", "8")),
+            "file_system": {
+                "timeout": float(os.getenv("TOOL_FS_TIMEOUT", "30")),
+                "max_concurrency": 8,
+                "max_output_bytes": 256 * 1024,
+            },
+            # Serialised per repository: concurrent git commands race for index.lock
+            "git": {
+                "timeout": float(os.getenv("TOOL_GIT_TIMEOUT", "60")),
+                "max_concurrency": 1,
+                "max_output_bytes": 256 * 1024,
+            },
+            "mcp": {
+                "timeout": float(os.getenv("TOOL_MCP_TIMEOUT", "60")),
+                "max_concurrency": 4,
+                "max_output_bytes": 256 * 1024,
+            },
+        },
+        "cache": {
+            "plan": {
+                "enabled": _env_bool("PLAN_CACHE", True),
+                "backend": os.getenv("PLAN_CACHE_BACKEND", "memory"),  # memory | sqlite
+                # Relative paths are under project_root
+                "path": os.getenv("CACHE_PATH", ".cline-agent/cache.sqlite3"),
+                "max_entries": int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "256")),
+                "ttl": float(os.getenv("PLAN_CACHE_TTL", "3600")),
+            },
+            # Exact-match LLM response cache (opt-in)
+            "llm": {
+                "enabled": _env_bool("LLM_CACHE", False),
+                "backend": os.getenv("LLM_CACHE_BACKEND", "memory"),  # memory | sqlite
+                "path": os.getenv("CACHE_PATH", ".cline-agent/cache.sqlite3"),
+                "max_entries": int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+                "ttl": float(os.getenv("LLM_CACHE_TTL", "86400")),
+                "phases": {
+                    "plan": _env_bool("LLM_CACHE_PLAN", True),
+                    "execute": _env_bool("LLM_CACHE_EXECUTE", True),
+                    "fallback": _env_bool("LLM_CACHE_FALLBACK", True),
+                },
+            },
+        },
         "logging": {
             "level": os.getenv("LOG_LEVEL", "INFO"),
             "renderer": os.getenv("LOG_RENDERER", "console"),
@@ -48,6 +120,40 @@ def load_config(config_path: str | Path | None = None) -> Dict[str, Any]:
                 "execute": os.getenv("LLM_EXECUTE_MODEL", "openai"),
                 "fallback": os.getenv("LLM_FALLBACK_MODEL", "groq"),
             },
+            "timeout_s": float(os.getenv("LLM_TIMEOUT", "60")),
+            "max_retries": int(os.getenv("LLM_MAX_RETRIES", "2")),
+            # Latency-aware routing: each phase may list providers in preference
+            # order; the fastest one with a closed circuit breaker is used.
+            "routing": {
+                "preferences": {
+                    "plan": _env_list("LLM_PLAN_PROVIDERS"),
+                    "execute": _env_list("LLM_EXECUTE_PROVIDERS"),
+                    "fallback": _env_list("LLM_FALLBACK_PROVIDERS"),
+                },
+                "failure_threshold": int(os.getenv("LLM_BREAKER_FAILURES", "3")),
+                "error_rate_threshold": float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5")),
+                "window": 20,
+                "cooldown_s": float(os.getenv("LLM_BREAKER_COOLDOWN", "30")),
+                "ewma_alpha": 0.2,
+            },
+            # Hedged requests: after the phase's p90 latency, also ask a secondary
+            # provider and keep whichever valid answer arrives first.
+            "hedging": {
+                "enabled": _env_bool("LLM_HEDGING", False),
+                "percentile": float(os.getenv("LLM_HEDGE_PERCENTILE", "90")),
+                "min_samples": 20,  # use default_delay_ms until this many samples
+                "default_delay_ms": float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_MS", "3000")),
+                "phases": {
+                    "plan": {
+                        "secondary": os.getenv("LLM_HEDGE_PLAN", "groq"),
+                        "budget": float(os.getenv("LLM_HEDGE_PLAN_BUDGET", "0.1")),
+                    },
+                    "fallback": {
+                        "secondary": os.getenv("LLM_HEDGE_FALLBACK", "sambanova"),
+                        "budget": float(os.getenv("LLM_HEDGE_FALLBACK_BUDGET", "0.1")),
+                    },
+                },
+            },
         },
     }
 
@@ -66,6 +172,19 @@ def load_config(config_path: str | Path | None = None) -> Dict[str, Any]:
     return defaults
 
 
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean flag such as ``1``/``true``/``yes`` from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_list(name: str) -> List[str]:
+    """Read a comma-separated list from the environment."""
+    return [item.strip() for item in os.getenv(name, "").split(",") if item.strip()]
+
+
 def _deep_merge(base: Dict, override: Dict) -> Dict:
     """Deep merge override into base dict."""
     result = base.copy()
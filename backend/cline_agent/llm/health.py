@@ -0,0 +1,203 @@
+"""Per-provider health tracking and circuit breakers for LLM routing."""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import openai
+import structlog
+
+from ..metrics import LatencyWindow
+
+log = structlog.get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Whether ``error`` says the provider is unhealthy: a 5xx, a timeout or a
+    connection failure. Client errors (bad request, context too long, rate
+    limits) are about the request, not the provider."""
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return isinstance(error, (openai.APIConnectionError, asyncio.TimeoutError, TimeoutError, ConnectionError))
+
+
+class ProviderHealth:
+    """Latency, error rate and circuit breaker for one (provider, phase).
+
+    The breaker opens after ``failure_threshold`` consecutive failures, or
+    when the error rate over the last ``window`` calls reaches
+    ``error_rate_threshold``; only :func:`is_provider_failure` errors count.
+    After ``cooldown_s`` a single probe request is let through (half-open);
+    its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        phase: str,
+        failure_threshold: int = 3,
+        error_rate_threshold: float = 0.5,
+        window: int = 20,
+        cooldown_s: float = 30.0,
+        ewma_alpha: float = 0.2,
+    ):
+        self.provider = provider
+        self.phase = phase
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.cooldown_s = cooldown_s
+        self.latency = LatencyWindow(alpha=ewma_alpha)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.successes = 0
+        self.failures = 0
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._probe_started: Optional[float] = None
+
+    @property
+    def error_rate(self) -> Optional[float]:
+        if not self.outcomes:
+            return None
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def allows_request(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.cooldown_s:
+            self.state = HALF_OPEN
+        if self.state != HALF_OPEN:
+            return False
+        # One probe at a time; a probe that never reports back expires after a cooldown.
+        return self._probe_started is None or now - self._probe_started >= self.cooldown_s
+
+    def begin(self) -> None:
+        """Claim the half-open probe; call right before the request is sent
+        and always follow with :meth:`record`, which releases it."""
+        if self.state == HALF_OPEN:
+            self._probe_started = time.monotonic()
+
+    def record(self, seconds: float, error: Optional[BaseException]) -> None:
+        self._probe_started = None
+        if error is not None and not is_provider_failure(error):
+            # Cancelled by a hedge or a disconnect, or rejected as a bad
+            # request: says nothing about the provider's health.
+            return
+        if error is None:
+            self.latency.record(seconds)
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.outcomes.append(True)
+            if self.state != CLOSED:
+                log.info("llm.breaker.closed", provider=self.provider, phase=self.phase)
+            self.state = CLOSED
+            return
+
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.outcomes.append(False)
+        self.last_error = f"{type(error).__name__}: {error}"
+        rate = self.error_rate or 0.0
+        if (
+            self.state == HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+            or (len(self.outcomes) >= self.outcomes.maxlen // 2 and rate >= self.error_rate_threshold)
+        ):
+            if self.state != OPEN:
+                log.warning("llm.breaker.open", provider=self.provider, phase=self.phase, error=self.last_error, error_rate=rate)
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == OPEN and self.opened_at is not None:
+            retry_in = round(max(0.0, self.cooldown_s - (time.monotonic() - self.opened_at)), 1)
+        return {
+            "state": self.state,
+            "retry_in_s": retry_in,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "error_rate": round(self.error_rate, 3) if self.error_rate is not None else None,
+            "last_error": self.last_error,
+            "latency": self.latency.snapshot(),
+        }
+
+
+class HealthRegistry:
+    """Health of every (provider, phase) pair and the router's last decisions."""
+
+    def __init__(self, routing_config: Dict[str, Any] | None = None):
+        cfg = routing_config or {}
+        self._settings = {
+            "failure_threshold": int(cfg.get("failure_threshold", 3)),
+            "error_rate_threshold": float(cfg.get("error_rate_threshold", 0.5)),
+            "window": int(cfg.get("window", 20)),
+            "cooldown_s": float(cfg.get("cooldown_s", 30)),
+            "ewma_alpha": float(cfg.get("ewma_alpha", 0.2)),
+        }
+        self._health: Dict[Tuple[str, str], ProviderHealth] = {}
+        self.decisions: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, provider: str, phase: str) -> ProviderHealth:
+        key = (provider, phase)
+        if key not in self._health:
+            self._health[key] = ProviderHealth(provider, phase, **self._settings)
+        return self._health[key]
+
+    def choose(self, phase: str, candidates: List[str], skipped: Dict[str, str]) -> str:
+        """Pick the fastest provider whose breaker admits a request.
+
+        ``candidates`` are in preference order; providers without latency
+        samples yet are tried first so every candidate gets measured. When
+        every breaker is open, the one closest to its retry is used.
+        """
+        considered = []
+        for rank, provider in enumerate(candidates):
+            health = self.get(provider, phase)
+            allowed = health.allows_request()
+            considered.append((provider, health, allowed, rank))
+
+        healthy = [c for c in considered if c[2]]
+        if healthy:
+            provider, health, _, _ = min(
+                healthy, key=lambda c: (c[1].latency.ewma is not None, c[1].latency.ewma or 0.0, c[3])
+            )
+            if len(candidates) == 1:
+                reason = "only candidate"
+            elif health.state == HALF_OPEN:
+                reason = "half-open probe"
+            elif health.latency.ewma is None:
+                reason = "not measured yet"
+            else:
+                reason = "fastest healthy provider"
+        else:
+            provider, health, _, _ = min(considered, key=lambda c: c[1].opened_at or 0.0)
+            reason = "all circuits open; using the oldest"
+
+        self.decisions[phase] = {
+            "provider": provider,
+            "reason": reason,
+            "candidates": [
+                {"provider": p, "state": h.state, "ewma_ms": h.latency.snapshot()["ewma_ms"], "allowed": a}
+                for p, h, a, _ in considered
+            ],
+            "skipped": skipped,
+            "at": time.time(),
+        }
+        log.debug("llm.route", phase=phase, provider=provider, reason=reason)
+        return provider
+
+    def snapshot(self) -> Dict[str, Any]:
+        providers: Dict[str, Dict[str, Any]] = {}
+        for (provider, phase), health in sorted(self._health.items()):
+            providers.setdefault(provider, {})[phase] = health.snapshot()
+        return {"providers": providers, "decisions": self.decisions}
@@ -0,0 +1,122 @@
+"""Hedged LLM requests: race a secondary provider when the primary is slow."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import structlog
+
+from ..metrics import LatencyWindow
+
+log = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class HedgePolicy:
+    """Per-phase hedging state.
+
+    The primary request gets ``delay()`` seconds (the phase's observed
+    ``percentile`` latency, or a fixed ``delay_ms``) to answer. After that the
+    same request is also sent to the secondary provider, unless hedges already
+    make up more than ``budget`` of this phase's requests. The first call that
+    returns a valid result wins and the other is cancelled.
+    """
+
+    def __init__(
+        self,
+        phase: str,
+        secondary: str,
+        budget: float = 0.1,
+        percentile: float = 90,
+        delay_ms: Optional[float] = None,
+        default_delay_ms: float = 3000,
+        min_samples: int = 20,
+    ):
+        self.phase = phase
+        self.secondary = secondary
+        self.budget = budget
+        self.percentile = percentile
+        self.delay_ms = delay_ms
+        self.default_delay_ms = default_delay_ms
+        self.min_samples = min_samples
+        self.latency = LatencyWindow()
+        self.requests = 0
+        self.hedged = 0
+        self.secondary_wins = 0
+
+    def delay(self) -> float:
+        if self.delay_ms is not None:
+            return self.delay_ms / 1000
+        if len(self.latency) < self.min_samples:
+            return self.default_delay_ms / 1000
+        return self.latency.percentile(self.percentile)
+
+    def _within_budget(self) -> bool:
+        return (self.hedged + 1) / self.requests <= self.budget
+
+    async def run(
+        self,
+        primary: Callable[[], Awaitable[T]],
+        secondary: Callable[[], Awaitable[T]],
+    ) -> T:
+        self.requests += 1
+        first = asyncio.ensure_future(primary())
+        try:
+            done, _ = await asyncio.wait({first}, timeout=self.delay())
+        except asyncio.CancelledError:
+            first.cancel()
+            raise
+        if done or not self._within_budget():
+            return await first
+
+        self.hedged += 1
+        log.info("llm.hedge", phase=self.phase, secondary=self.secondary)
+        second = asyncio.ensure_future(secondary())
+        pending = {first, second}
+        error: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.secondary_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "secondary": self.secondary,
+            "budget": self.budget,
+            "delay_ms": round(self.delay() * 1000, 1),
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "secondary_wins": self.secondary_wins,
+            "latency": self.latency.snapshot(),
+        }
+
+
+def hedge_policies(llm_config: Dict[str, Any]) -> Dict[str, HedgePolicy]:
+    """Build one policy per configured phase, or none when hedging is disabled."""
+    cfg = llm_config.get("hedging", {})
+    if not cfg.get("enabled"):
+        return {}
+    policies = {}
+    for phase, phase_cfg in (cfg.get("phases") or {}).items():
+        if not phase_cfg or not phase_cfg.get("secondary"):
+            continue
+        policies[phase] = HedgePolicy(
+            phase,
+            phase_cfg["secondary"],
+            budget=float(phase_cfg.get("budget", cfg.get("budget", 0.1))),
+            percentile=float(cfg.get("percentile", 90)),
+            delay_ms=phase_cfg.get("delay_ms"),
+            default_delay_ms=float(cfg.get("default_delay_ms", 3000)),
+            min_samples=int(cfg.get("min_samples", 20)),
+        )
+    return policies
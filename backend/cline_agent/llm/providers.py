@@ -1,18 +1,42 @@
 """LLM Router supporting multiple providers with phase-based model selection."""
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import Any, Dict, List, Optional, Type
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Type, TypeVar
 
 import structlog
-from openai import OpenAI
+from openai import AsyncOpenAI
 from pydantic import BaseModel
 
+from ..cache.response_cache import ResponseCache
+from .health import HealthRegistry
+from .hedging import HedgePolicy, hedge_policies
+
 log = structlog.get_logger(__name__)
 
+T = TypeVar("T")
+
+# Called after every provider round trip with (seconds, error or None).
+CompletionHook = Callable[[float, Optional[BaseException]], None]
+
+
+class RoundTripObserver:
+    """Callbacks around each provider round trip; cache hits make none."""
 
-class LLMClient:
-    """Wrapper around OpenAI-compatible API client."""
+    def __init__(self, on_start: Callable[[], None], on_complete: CompletionHook):
+        self.on_start = on_start
+        self.on_complete = on_complete
+
+
+class AsyncLLMClient:
+    """Wrapper around an OpenAI-compatible API client (``AsyncOpenAI``).
+
+    Instances are shared between concurrent requests, so per-call settings
+    (such as the structured response model or response cache) are passed as
+    arguments rather than stored on the client.
+    """
 
     def __init__(
         self,
@@ -20,53 +44,203 @@ class LLMClient:
         base_url: Optional[str] = None,
         model: str = "gpt-4o",
         response_model: Optional[Type[BaseModel]] = None,
+        provider: str = "openai",
+        timeout: float = 60.0,
+        max_retries: int = 2,
     ):
+        self.provider = provider
         self.model = model
         self.response_model = response_model
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
-        log.debug("LLMClient init", model=model, base_url=base_url)
+        self.client = AsyncOpenAI(
+            api_key=api_key, base_url=base_url, timeout=timeout, max_retries=max_retries
+        )
+        log.debug("AsyncLLMClient init", model=model, base_url=base_url)
 
-    def generate(
+    async def warm(self) -> None:
+        """Open a pooled connection to the provider ahead of the first request."""
+        try:
+            await self.client.models.list()
+        except Exception as exc:
+            log.warning("AsyncLLMClient warm-up failed", model=self.model, error=str(exc))
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+    async def _complete(self, observer: Optional[RoundTripObserver], **kwargs: Any) -> Any:
+        """One provider round trip; cache hits never reach this point."""
+        if observer is not None:
+            observer.on_start()
+        start = time.perf_counter()
+        error: Optional[BaseException] = None
+        try:
+            return await self.client.chat.completions.create(model=self.model, **kwargs)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            if observer is not None:
+                observer.on_complete(time.perf_counter() - start, error)
+
+    async def generate(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.7,
         max_tokens: int = 4096,
+        cache: Optional[ResponseCache] = None,
+        observer: Optional[RoundTripObserver] = None,
     ) -> str:
         """Generate a text response."""
-        response = self.client.chat.completions.create(
-            model=self.model,
+        key = cache.key(self.provider, self.model, messages, temperature, max_tokens) if cache else None
+        if key and (hit := await cache.aget(key)) is not None:
+            return hit
+
+        response = await self._complete(
+            observer,
             messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
         )
-        return response.choices[0].message.content or ""
+        text = response.choices[0].message.content or ""
+        if key:
+            await cache.aput(key, text)
+        return text
 
-    def generate_structured(
+    async def generate_structured(
         self,
         messages: List[Dict[str, str]],
+        response_model: Optional[Type[BaseModel]] = None,
         temperature: float = 0.7,
         max_tokens: int = 4096,
+        cache: Optional[ResponseCache] = None,
+        observer: Optional[RoundTripObserver] = None,
     ) -> BaseModel:
-        """Generate a structured response matching self.response_model."""
-        if not self.response_model:
+        """Generate a structured response matching response_model."""
+        response_model = response_model or self.response_model
+        if not response_model:
             raise ValueError("response_model must be set for structured generation")
 
-        # Use JSON mode
-        response = self.client.chat.completions.create(
-            model=self.model,
+        response_format = {"type": "json_object"}
+        key = None
+        if cache:
+            key = cache.key(
+                self.provider, self.model, messages, temperature, max_tokens, response_format, response_model
+            )
+            if (hit := await cache.aget(key)) is not None:
+                return hit
+
+        response = await self._complete(
+            observer,
             messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
-            response_format={"type": "json_object"},
+            response_format=response_format,
         )
 
         content = response.choices[0].message.content or "{}"
         data = json.loads(content)
-        return self.response_model.model_validate(data)
+        result = response_model.model_validate(data)
+        if key:
+            await cache.aput(key, result)
+        return result
+
+
+class PhaseClient:
+    """LLM handle bound to one phase, as returned by :meth:`LLMRouter.for_phase`.
+
+    Delegates to the provider's shared :class:`AsyncLLMClient`, applies the
+    phase's response-cache policy and, when configured, hedges slow requests
+    to a secondary provider.
+    """
+
+    def __init__(
+        self,
+        phase: str,
+        provider: str,
+        client: AsyncLLMClient,
+        cache: Optional[ResponseCache] = None,
+        hedge: Optional[HedgePolicy] = None,
+        hedge_client: Optional[AsyncLLMClient] = None,
+        health: Optional[HealthRegistry] = None,
+    ):
+        self.phase = phase
+        self.provider = provider
+        self.client = client
+        self.cache = cache
+        self.hedge = hedge if hedge_client is not None else None
+        self.hedge_client = hedge_client
+        self.health = health
+
+    @property
+    def model(self) -> str:
+        return self.client.model
+
+    def _observer(self, provider: str, primary: bool) -> RoundTripObserver:
+        """Feed provider round trips into health tracking and the hedge delay.
+
+        The breaker's half-open probe is claimed only when a request is
+        actually sent (not on routing or a cache hit) and released when it ends.
+        """
+        health = self.health.get(provider, self.phase) if self.health is not None else None
+
+        def start() -> None:
+            if health is not None:
+                health.begin()
+
+        def hook(seconds: float, error: Optional[BaseException]) -> None:
+            if health is not None:
+                health.record(seconds, error)
+            # Cancelled primaries still bound the phase latency from below.
+            if primary and self.hedge is not None and (
+                error is None or isinstance(error, asyncio.CancelledError)
+            ):
+                self.hedge.latency.record(seconds)
+
+        return RoundTripObserver(start, hook)
+
+    async def _call(self, call: Callable[[AsyncLLMClient, Optional[RoundTripObserver]], Awaitable[T]]) -> T:
+        primary = self._observer(self.provider, primary=True)
+        if self.hedge is None:
+            return await call(self.client, primary)
+        secondary = self._observer(self.hedge.secondary, primary=False)
+        return await self.hedge.run(
+            lambda: call(self.client, primary),
+            lambda: call(self.hedge_client, secondary),
+        )
+
+    async def generate(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> str:
+        return await self._call(
+            lambda client, observer: client.generate(
+                messages, temperature, max_tokens, cache=self.cache, observer=observer
+            )
+        )
+
+    async def generate_structured(
+        self,
+        messages: List[Dict[str, str]],
+        response_model: Optional[Type[BaseModel]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> BaseModel:
+        return await self._call(
+            lambda client, observer: client.generate_structured(
+                messages, response_model, temperature, max_tokens, cache=self.cache, observer=observer
+            )
+        )
 
 
 class LLMRouter:
-    """Route LLM requests to different providers based on phase."""
+    """Route LLM requests to different providers based on phase.
+
+    The router hands out :class:`PhaseClient` handles over one shared
+    :class:`AsyncLLMClient` per provider, plus the optional response cache.
+    Each phase may list several providers (``llm.routing.preferences``); the
+    router then picks the fastest one whose circuit breaker is closed.
+    """
 
     # Provider configurations (base_url for OpenAI-compatible APIs)
     PROVIDERS = {
@@ -80,14 +254,19 @@ class LLMRouter:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.llm_config = config.get("llm", {})
-        self._clients: Dict[str, LLMClient] = {}
+        self._clients: Dict[str, AsyncLLMClient] = {}
+        self.response_cache = ResponseCache.from_config(config)
+        self.hedges = hedge_policies(self.llm_config)
+        self.health = HealthRegistry(self.llm_config.get("routing"))
         log.debug("LLMRouter init", default_provider=self.llm_config.get("default_provider"))
 
-    def _get_client(self, provider: str) -> LLMClient:
+    def _get_client(self, provider: str) -> AsyncLLMClient:
         """Get or create a client for the specified provider."""
-        if provider in self._clients:
-            return self._clients[provider]
+        if provider not in self._clients:
+            self._clients[provider] = self._create_client(provider)
+        return self._clients[provider]
 
+    def _create_client(self, provider: str) -> AsyncLLMClient:
         provider_config = self.llm_config.get(provider, {})
         api_key = provider_config.get("api_key", "")
         model = provider_config.get("model", "gpt-4o")
@@ -95,18 +274,20 @@ class LLMRouter:
 
         if not api_key:
             log.warning(f"No API key for provider {provider}, using default")
-            # Fall back to OpenAI
-            provider = "openai"
-            provider_config = self.llm_config.get("openai", {})
-            api_key = provider_config.get("api_key", "")
-            model = provider_config.get("model", "gpt-4o")
-            base_url = None
-
-        client = LLMClient(api_key=api_key, base_url=base_url, model=model)
-        self._clients[provider] = client
-        return client
-
-    def for_phase(self, phase: str) -> LLMClient:
+            # Fall back to OpenAI, sharing its client with the other fallbacks
+            if provider != "openai":
+                return self._get_client("openai")
+
+        return AsyncLLMClient(
+            api_key=api_key,
+            base_url=base_url,
+            model=model,
+            provider=provider,
+            timeout=float(self.llm_config.get("timeout_s", 60)),
+            max_retries=int(self.llm_config.get("max_retries", 2)),
+        )
+
+    def for_phase(self, phase: str) -> PhaseClient:
         """Get the appropriate LLM client for a specific phase.
 
         Phases:
@@ -114,7 +295,48 @@ class LLMRouter:
             - 'execute': Model for execution/code generation
             - 'fallback': Cheaper/faster model for reflection
         """
-        phases = self.llm_config.get("phases", {})
-        provider = phases.get(phase, self.llm_config.get("default_provider", "openai"))
+        provider = self._route(phase)
         log.debug("LLMRouter.for_phase", phase=phase, provider=provider)
-        return self._get_client(provider)
+        cache = self.response_cache
+        if cache is not None and not cache.enabled_for(phase):
+            cache = None
+        client = self._get_client(provider)
+        hedge = self.hedges.get(phase)
+        hedge_client = self._get_client(hedge.secondary) if hedge else None
+        if hedge_client is client:
+            # Secondary resolved to the same provider (e.g. missing API key)
+            hedge_client = None
+        return PhaseClient(phase, provider, client, cache, hedge, hedge_client, self.health)
+
+    def _route(self, phase: str) -> str:
+        """Choose the provider for one call of ``phase``."""
+        phases = self.llm_config.get("phases", {})
+        default = phases.get(phase, self.llm_config.get("default_provider", "openai"))
+        preferences = (self.llm_config.get("routing", {}).get("preferences") or {}).get(phase)
+        candidates = list(preferences or [default])
+
+        skipped = {p: "no API key" for p in candidates if not self.llm_config.get(p, {}).get("api_key")}
+        usable = [p for p in candidates if p not in skipped]
+        if not usable:
+            # Nothing configured: keep the old behaviour (the client falls back to OpenAI)
+            return default
+        return self.health.choose(phase, usable, skipped)
+
+    async def warm(self) -> None:
+        """Create the clients for every configured phase and pre-open their connections."""
+        phases = self.llm_config.get("phases", {})
+        clients = {id(c): c for c in (self.for_phase(phase).client for phase in phases)}
+        await asyncio.gather(*(client.warm() for client in clients.values()))
+        log.info("LLMRouter warmed", clients=len(clients))
+
+    def hedge_stats(self) -> Dict[str, Any]:
+        return {phase: policy.stats() for phase, policy in self.hedges.items()}
+
+    def provider_state(self) -> Dict[str, Any]:
+        """Health, breaker state and last routing decision per phase, for operators."""
+        return {**self.health.snapshot(), "hedging": self.hedge_stats()}
+
+    async def aclose(self) -> None:
+        clients = {id(c): c for c in self._clients.values()}
+        self._clients.clear()
+        await asyncio.gather(*(client.aclose() for client in clients.values()))
@@ -0,0 +1,42 @@
+"""Lightweight in-process latency statistics."""
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+class LatencyWindow:
+    """Rolling window of the most recent latencies (in seconds), plus an EWMA."""
+
+    def __init__(self, size: int = 256, alpha: float = 0.2):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self.alpha = alpha
+        self.ewma: Optional[float] = None
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.ewma = seconds if self.ewma is None else self.alpha * seconds + (1 - self.alpha) * self.ewma
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile (``q`` in 0-100), or None without samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(q / 100 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "count": len(self._samples),
+            "ewma_ms": ms(self.ewma),
+            "p50_ms": ms(self.percentile(50)),
+            "p90_ms": ms(self.percentile(90)),
+            "p99_ms": ms(self.percentile(99)),
+        }
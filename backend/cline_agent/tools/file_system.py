@@ -1,42 +1,424 @@
 from __future__ import annotations
 
+import mmap
+import os
+import re
+import stat
+import uuid
 from pathlib import Path
 import structlog
 import aiofiles
+import aiofiles.os
 import asyncio
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .ignore import GitIgnore
+from .search import search_files
+from .workspace_index import WorkspaceIndex, glob_regex
 
 log = structlog.get_logger(__name__)
 
+# Bytes sniffed for a NUL to decide a file is binary (same heuristic as git).
+BINARY_SNIFF_BYTES = 8192
+
+# Files larger than this are not searched (logs, dumps, lockfiles).
+SEARCH_MAX_FILE_BYTES = 4 * 1024 * 1024
+SEARCH_OPTIONS = ("literal", "ignore_case", "glob", "max")
+
+# (start, stop) of a line or byte selector; stop may be open-ended.
+Range = Tuple[int, Optional[int]]
+
+
+def _parse_selectors(selectors: Tuple[str, ...]) -> Tuple[Optional[Range], Optional[Range]]:
+    """Parse ``lines=START:END`` (1-based, inclusive) and ``bytes=OFFSET:LENGTH``."""
+    lines = byte_range = None
+    for selector in selectors:
+        kind, _, spec = selector.partition("=")
+        first, _, second = spec.partition(":")
+        try:
+            start = int(first) if first else None
+            stop = int(second) if second else None
+        except ValueError:
+            raise ValueError(f"Invalid read selector: {selector!r}") from None
+        if kind == "lines":
+            lines = (max(1, start or 1), stop)
+        elif kind == "bytes":
+            byte_range = (max(0, start or 0), stop)
+        else:
+            raise ValueError(f"Unknown read selector: {selector!r} (use lines=A:B or bytes=OFFSET:LENGTH)")
+    return lines, byte_range
+
+
+def _line_window(buf: Any, start: int, stop: Optional[int], size: int) -> Tuple[int, int]:
+    """Byte span of lines ``start..stop``; only scans up to the last requested line."""
+    pos, line = 0, 1
+    while line < start and pos < size:
+        nl = buf.find(b"\n", pos)
+        if nl < 0:
+            return size, size
+        pos, line = nl + 1, line + 1
+    begin = pos
+    if stop is None:
+        return begin, size
+    while line <= stop and pos < size:
+        nl = buf.find(b"\n", pos)
+        if nl < 0:
+            return begin, size
+        pos, line = nl + 1, line + 1
+    return begin, pos
+
+
+def _pairs(args: Tuple[str, ...]) -> List[Tuple[str, str]]:
+    """Split ``write_many`` args (path, content, path, content, ...) into pairs."""
+    if not args or len(args) % 2:
+        raise ValueError("write_many takes path/content pairs")
+    pairs = list(zip(args[::2], args[1::2]))
+    paths = [path for path, _ in pairs]
+    if len(set(paths)) != len(paths):
+        raise ValueError("write_many got the same path twice")
+    return pairs
+
+
+def _temp_path(target: Path) -> Path:
+    """Sibling temp file, so the final rename stays on one filesystem."""
+    return target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+def _commit_temps(renames: Iterable[Tuple[Path, Path]], fsync: bool) -> None:
+    """Rename temp files over their targets, keeping existing permissions, then
+    fsync each parent directory once so the renames are durable."""
+    parents = set()
+    for tmp, target in renames:
+        try:
+            os.chmod(tmp, stat.S_IMODE(os.stat(target).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, target)
+        parents.add(target.parent)
+    if not fsync:
+        return
+    for parent in parents:
+        try:
+            fd = os.open(parent, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass  # not supported for directories on every platform
+        finally:
+            os.close(fd)
+
+
+def _discard_temps(temps: Iterable[Path]) -> None:
+    for tmp in temps:
+        try:
+            tmp.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _section(path: str, result: Dict[str, Any]) -> str:
+    body = result["stdout"] if result.get("success") else f"[error] {result.get('stderr')}"
+    return f"==> {path} <==\n{body}"
+
+
+def _elide(buf: Any, begin: int, end: int, limit: int) -> str:
+    """Decode ``buf[begin:end]``, keeping only its head and tail (on line
+    boundaries) when it exceeds ``limit`` bytes; nothing else is copied."""
+    if end - begin <= limit:
+        return bytes(buf[begin:end]).decode("utf-8", errors="replace")
+    half = limit // 2
+    head = bytes(buf[begin : begin + half])
+    tail = bytes(buf[end - half : end])
+    if b"\n" in head:
+        head = head[: head.rfind(b"\n") + 1]
+    if b"\n" in tail:
+        tail = tail[tail.find(b"\n") + 1 :]
+    elided = end - begin - len(head) - len(tail)
+    marker = f"\n… [{elided} bytes elided; read a range with lines=A:B or bytes=OFFSET:LENGTH] …\n"
+    return head.decode("utf-8", errors="replace") + marker + tail.decode("utf-8", errors="replace")
+
 
 class FileSystemTool:
-    def __init__(self, root: str | Path = "."):
+    def __init__(
+        self,
+        root: str | Path = ".",
+        max_read_bytes: int = 64 * 1024,
+        mmap_threshold: int = 1024 * 1024,
+        fsync: bool = True,
+        batch_concurrency: int = 16,
+    ):
         self.root = Path(root).resolve()
+        self.max_read_bytes = max_read_bytes
+        self.mmap_threshold = mmap_threshold
+        self.fsync = fsync
+        self.batch_concurrency = max(1, batch_concurrency)
+        self.index = WorkspaceIndex(self.root)
 
     def _resolve(self, path: str) -> Path:
         p = (self.root / path).resolve()
-        if not str(p).startswith(str(self.root)):
+        # A string prefix check would also accept siblings such as <root>2/.
+        if not p.is_relative_to(self.root):
             raise PermissionError("Sandbox escape detected")
         return p
 
+    def _written(self, files: List[Tuple[Path, str]]) -> None:
+        for target, content in files:
+            self.index.note_write(str(target.relative_to(self.root)))
+            log.info("file written", path=str(target), bytes=len(content))
+
+    @staticmethod
+    def _write_summary(pairs: List[Tuple[str, str]]) -> Dict[str, Any]:
+        if len(pairs) == 1:
+            path, content = pairs[0]
+            return {"success": True, "stdout": f"Wrote {len(content)} bytes to {path}"}
+        total = sum(len(content) for _, content in pairs)
+        return {"success": True, "stdout": f"Wrote {len(pairs)} files ({total} bytes): "
+                + ", ".join(path for path, _ in pairs)}
+
     # ---------- synchronous wrappers ----------
+    def _write_batch(self, files: List[Tuple[Path, str]]) -> None:
+        """Write ``files`` atomically: every file goes to a temp sibling (fsync'd
+        when enabled); only once all succeeded are they renamed into place."""
+        temps: List[Path] = []
+        try:
+            for target, content in files:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                temps.append(_temp_path(target))
+                with open(temps[-1], "w", encoding="utf-8") as fh:
+                    fh.write(content)
+                    if self.fsync:
+                        fh.flush()
+                        os.fsync(fh.fileno())
+        except BaseException:
+            _discard_temps(temps)
+            raise
+        _commit_temps(zip(temps, (target for target, _ in files)), self.fsync)
+        self._written(files)
+
     def write(self, path: str, content: str) -> Dict[str, Any]:
-        target = self._resolve(path)
-        target.parent.mkdir(parents=True, exist_ok=True)
-        target.write_text(content, encoding="utf-8")
-        log.info("file written", path=str(target), bytes=len(content))
-        return {"success": True, "stdout": f"Wrote {len(content)} bytes to {path}"}
+        self._write_batch([(self._resolve(path), content)])
+        return self._write_summary([(path, content)])
+
+    def write_many(self, *args: str) -> Dict[str, Any]:
+        """Write several files as one batch: args are path, content, path, content, ..."""
+        pairs = _pairs(args)
+        self._write_batch([(self._resolve(path), content) for path, content in pairs])
+        return self._write_summary(pairs)
+
+    def read_many(self, *paths: str) -> Dict[str, Any]:
+        """Read several whole files; each is capped like ``read``."""
+        results = []
+        for path in paths:
+            try:
+                results.append(self.read(path))
+            except (OSError, ValueError) as exc:
+                results.append({"success": False, "stderr": str(exc)})
+        return self._read_summary(paths, results)
+
+    @staticmethod
+    def _read_summary(paths: Tuple[str, ...], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        failed = [f"{path}: {r.get('stderr')}" for path, r in zip(paths, results) if not r.get("success")]
+        out = {
+            "success": len(failed) < len(paths),
+            "stdout": "\n\n".join(_section(path, r) for path, r in zip(paths, results)),
+        }
+        if failed:
+            out["stderr"] = "\n".join(failed)
+        return out
 
-    def read(self, path: str) -> Dict[str, Any]:
+    def read(self, path: str, *selectors: str) -> Dict[str, Any]:
+        """Read a file, optionally a window of it.
+
+        ``selectors`` are ``lines=START:END`` (1-based, inclusive) and/or
+        ``bytes=OFFSET:LENGTH`` (applied to the selected lines). Files above
+        ``mmap_threshold`` are memory-mapped so only the requested window is
+        paged in. Results above ``max_read_bytes`` keep their head and tail.
+        """
         target = self._resolve(path)
-        content = target.read_text(encoding="utf-8")
-        log.info("file read", path=str(target), bytes=len(content))
+        lines, byte_range = _parse_selectors(selectors)
+        with open(target, "rb") as fh:
+            if b"\0" in fh.read(BINARY_SNIFF_BYTES):
+                size = target.stat().st_size
+                log.info("file read skipped: binary", path=str(target), bytes=size)
+                return {"success": False, "stderr": f"{path} is a binary file ({size} bytes)"}
+            size = fh.seek(0, 2)
+            if size >= self.mmap_threshold:
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    begin, end = self._window(buf, size, lines, byte_range)
+                    content = _elide(buf, begin, end, self.max_read_bytes)
+            else:
+                fh.seek(0)
+                buf = fh.read()
+                begin, end = self._window(buf, size, lines, byte_range)
+                content = _elide(buf, begin, end, self.max_read_bytes)
+        log.info("file read", path=str(target), bytes=end - begin, file_bytes=size)
         return {"success": True, "stdout": content}
 
+    @staticmethod
+    def _window(buf: Any, size: int, lines: Optional[Range], byte_range: Optional[Range]) -> Tuple[int, int]:
+        begin, end = _line_window(buf, lines[0], lines[1], size) if lines else (0, size)
+        if byte_range:
+            offset, length = byte_range
+            begin = min(end, begin + offset)
+            if length is not None:
+                end = min(end, begin + length)
+        return begin, end
+
     def list_dir(self, path: str = ".") -> Dict[str, Any]:
         target = self._resolve(path)
-        if not target.is_dir():
-            return {"success": False, "stderr": f"{path} is not a directory"}
-        entries = sorted(p.name for p in target.iterdir())
+        entries = self.index.list_dir(str(target.relative_to(self.root)))
+        if entries is None:
+            # Not indexed (e.g. node_modules): list it directly.
+            if not target.is_dir():
+                return {"success": False, "stderr": f"{path} is not a directory"}
+            entries = sorted(p.name for p in target.iterdir())
         log.info("directory listed", path=str(target), entries=len(entries))
         return {"success": True, "stdout": "\n".join(entries)}
+
+    def tree(self, path: str = ".", depth: str = "3") -> Dict[str, Any]:
+        target = self._resolve(path)
+        text = self.index.tree(str(target.relative_to(self.root)), max_depth=max(1, int(depth)))
+        if text is None:
+            return {"success": False, "stderr": f"{path} is not an indexed directory"}
+        log.info("tree listed", path=str(target), depth=depth)
+        return {"success": True, "stdout": text}
+
+    def search(self, pattern: str, path: str = ".", *options: str) -> Dict[str, Any]:
+        """Regex search of file contents under ``path``, one line per match.
+
+        ``options``: ``literal``, ``ignore_case``, ``glob=PATTERN`` (e.g.
+        ``glob=*.py``) and ``max=N`` (default 200 matches). Binary, oversized
+        and ``.gitignore``d files are skipped.
+        """
+        if path.partition("=")[0] in SEARCH_OPTIONS:
+            return {"success": False, "stderr": f"search expects a directory before options, got {path!r}; "
+                                                 "pass '.' to search the whole project"}
+        target = self._resolve(path)
+        if not target.is_dir():
+            problem = "is not a directory" if target.exists() else "No such file or directory"
+            return {"success": False, "stderr": f"Search path {path!r}: {problem}"}
+        literal = ignore_case = False
+        file_glob = None
+        max_matches = 200
+        for option in options:
+            name, _, value = option.partition("=")
+            if name == "literal":
+                literal = True
+            elif name == "ignore_case":
+                ignore_case = True
+            elif name == "glob" and value:
+                file_glob = glob_regex(value if "/" in value else "**/" + value)
+            elif name == "max" and value.isdigit():
+                max_matches = max(1, int(value))
+            else:
+                return {"success": False, "stderr": f"Unknown search option: {option!r}"}
+
+        ignore = GitIgnore.load(self.root, self.index.glob("**/.gitignore"))
+        paths, oversized = [], 0
+        for rel, size, _ in self.index.iter_files(str(target.relative_to(self.root))):
+            if ignore.ignored(rel) or (file_glob is not None and not file_glob.match(rel)):
+                continue
+            if size > SEARCH_MAX_FILE_BYTES:
+                oversized += 1
+                continue
+            paths.append(rel)
+
+        try:
+            matches, binary, total = search_files(
+                str(self.root), paths, pattern, literal=literal, ignore_case=ignore_case,
+                max_matches=max_matches,
+            )
+        except re.error as exc:
+            return {"success": False, "stderr": f"Invalid pattern {pattern!r}: {exc}"}
+
+        log.info("search complete", pattern=pattern, files=len(paths), matches=total,
+                 binary_skipped=binary, oversized_skipped=oversized)
+        if not matches:
+            return {"success": True, "stdout": f"No matches for {pattern!r} in {len(paths)} files"}
+        lines = [f"{rel}:{line}: {text}" for rel, line, text in matches]
+        if total > len(matches):
+            files = len({rel for rel, _, _ in matches})
+            lines.append(f"… showing {len(matches)} of {total} matching lines (from {files}+ files); "
+                         "narrow the path or add glob=")
+        return {"success": True, "stdout": "\n".join(lines)}
+
+    def glob(self, pattern: str) -> Dict[str, Any]:
+        matches = self.index.glob(pattern)
+        log.info("glob matched", pattern=pattern, matches=len(matches))
+        return {"success": True, "stdout": "\n".join(matches)}
+
+
+class AsyncFileSystemTool(FileSystemTool):
+    """Async variant of :class:`FileSystemTool` using ``aiofiles``."""
+
+    async def _write_temp(self, limit: asyncio.Semaphore, tmp: Path, content: str) -> None:
+        async with limit:
+            await aiofiles.os.makedirs(tmp.parent, exist_ok=True)
+            async with aiofiles.open(tmp, "w", encoding="utf-8") as fh:
+                await fh.write(content)
+                if self.fsync:
+                    await fh.flush()
+                    await asyncio.to_thread(os.fsync, fh.fileno())
+
+    async def _write_batch(self, files: List[Tuple[Path, str]]) -> None:
+        """Concurrent temp writes, then renames once every file succeeded."""
+        temps = [_temp_path(target) for target, _ in files]
+        limit = asyncio.Semaphore(self.batch_concurrency)
+        results = await asyncio.gather(
+            *(self._write_temp(limit, tmp, content) for tmp, (_, content) in zip(temps, files)),
+            return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            await asyncio.to_thread(_discard_temps, temps)
+            raise errors[0]
+        await asyncio.to_thread(_commit_temps, list(zip(temps, (t for t, _ in files))), self.fsync)
+        self._written(files)
+
+    async def write(self, path: str, content: str) -> Dict[str, Any]:
+        await self._write_batch([(self._resolve(path), content)])
+        return self._write_summary([(path, content)])
+
+    async def write_many(self, *args: str) -> Dict[str, Any]:
+        pairs = _pairs(args)
+        await self._write_batch([(self._resolve(path), content) for path, content in pairs])
+        return self._write_summary(pairs)
+
+    async def _read_one(self, limit: asyncio.Semaphore, path: str) -> Dict[str, Any]:
+        async with limit:
+            try:
+                target = self._resolve(path)
+                size = (await aiofiles.os.stat(target)).st_size
+                if size >= self.mmap_threshold:
+                    return await asyncio.to_thread(FileSystemTool.read, self, path)
+                async with aiofiles.open(target, "rb") as fh:
+                    buf = await fh.read()
+            except (OSError, ValueError) as exc:
+                return {"success": False, "stderr": str(exc)}
+        if b"\0" in buf[:BINARY_SNIFF_BYTES]:
+            return {"success": False, "stderr": f"{path} is a binary file ({len(buf)} bytes)"}
+        log.info("file read", path=str(target), bytes=len(buf), file_bytes=len(buf))
+        return {"success": True, "stdout": _elide(buf, 0, len(buf), self.max_read_bytes)}
+
+    async def read_many(self, *paths: str) -> Dict[str, Any]:
+        limit = asyncio.Semaphore(self.batch_concurrency)
+        results = await asyncio.gather(*(self._read_one(limit, path) for path in paths))
+        return self._read_summary(paths, list(results))
+
+    async def read(self, path: str, *selectors: str) -> Dict[str, Any]:
+        # Ranged and memory-mapped reads are blocking; keep them off the event loop.
+        return await asyncio.to_thread(super().read, path, *selectors)
+
+    async def list_dir(self, path: str = ".") -> Dict[str, Any]:
+        return await asyncio.to_thread(super().list_dir, path)
+
+    async def tree(self, path: str = ".", depth: str = "3") -> Dict[str, Any]:
+        return await asyncio.to_thread(super().tree, path, depth)
+
+    async def search(self, pattern: str, path: str = ".", *options: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(super().search, pattern, path, *options)
+
+    async def glob(self, pattern: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(super().glob, pattern)
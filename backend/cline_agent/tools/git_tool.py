@@ -1,37 +1,305 @@
 from __future__ import annotations
 
+import asyncio
+import os
 import subprocess
+import tempfile
 from pathlib import Path
 import structlog
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .workspace_index import WorkspaceIndex
 
 log = structlog.get_logger(__name__)
 
+STREAM_CHUNK = 64 * 1024
+DEFAULT_LOG_ENTRIES = 20
+# Read-only commands must not take index.lock away from a concurrent add/commit.
+READ_ONLY = ["--no-optional-locks"]
+STATUS_ARGS = READ_ONLY + ["status", "--porcelain=v2", "--branch", "-z"]
+ADD_ARGS = ["add", "--pathspec-from-file=-", "--pathspec-file-nul"]
+
+
+def render_status(raw: str) -> str:
+    """Turn ``status --porcelain=v2 --branch -z`` records into short-format lines."""
+    head, ahead_behind, lines = None, None, []
+    records = iter(raw.split("\0"))
+    for rec in records:
+        if not rec:
+            continue
+        kind = rec[0]
+        if rec.startswith("# branch.head "):
+            head = rec[len("# branch.head "):]
+        elif rec.startswith("# branch.ab "):
+            ahead_behind = rec[len("# branch.ab "):]
+        elif kind == "1":
+            lines.append((rec[2:4], rec.split(" ", 8)[8]))
+        elif kind == "2":
+            # Renames/copies: the original path is the next NUL-separated record.
+            lines.append((rec[2:4], f"{next(records, '')} -> {rec.split(' ', 9)[9]}"))
+        elif kind == "u":
+            lines.append((rec[2:4], rec.split(" ", 10)[10]))
+        elif kind == "?":
+            lines.append(("??", rec[2:]))
+    out = []
+    if head is not None:
+        out.append(f"## {head}" + (f" [{ahead_behind}]" if ahead_behind and ahead_behind != "+0 -0" else ""))
+    out.extend(f"{xy.replace('.', ' ')} {path}" for xy, path in lines)
+    if not lines:
+        out.append("nothing to commit, working tree clean")
+    return "\n".join(out)
+
+
+def _diff_args(args: Tuple[str, ...]) -> List[str]:
+    """``diff`` options: ``staged``, ``stat``; anything else is a path."""
+    cmd, paths = READ_ONLY + ["diff", "--no-color", "--no-ext-diff"], []
+    for arg in args:
+        if arg == "staged":
+            cmd.append("--cached")
+        elif arg == "stat":
+            cmd.append("--stat")
+        else:
+            paths.append(arg)
+    return cmd + ["--"] + paths
+
+
+def _log_args(args: Tuple[str, ...]) -> List[str]:
+    """``log`` options: ``max=N`` (default 20); anything else is a path."""
+    count, paths = DEFAULT_LOG_ENTRIES, []
+    for arg in args:
+        name, _, value = arg.partition("=")
+        if name == "max" and value.isdigit():
+            count = max(1, int(value))
+        else:
+            paths.append(arg)
+    return READ_ONLY + ["log", "--no-color", f"--max-count={count}",
+                        "--format=%h %ad %an: %s", "--date=short", "--"] + paths
+
+
+def _failure_text(stdout: bytes, stderr: bytes) -> str:
+    """Error text of a failed command; some (``commit`` with nothing to commit) only write stdout."""
+    return (stderr or stdout or b"").decode(errors="replace").strip()
+
+
+def _capped(out: bytes, limit: int, truncated: bool) -> str:
+    if not truncated:
+        return out.decode(errors="replace").rstrip()
+    text = out[:limit].decode(errors="ignore")
+    text = text[: text.rfind("\n") + 1] or text
+    return text + f"… [output truncated at {limit} bytes; pass paths to narrow it]"
+
 
 class GitTool:
-    def __init__(self, root: str | Path = "."):
+    """Git commands for plan steps.
+
+    ``status`` is cached until HEAD, the branch ref, ``.git/index`` or the
+    workspace fingerprint (when a :class:`WorkspaceIndex` is given) change.
+    Writes made through the tools show up at once; the index notices files
+    created or deleted outside them within its ``min_interval``, and
+    in-place edits to existing files only at its next full rescan
+    (``full_rescan_interval``), so until then a cached status can miss them.
+    ``diff`` and ``log`` are read incrementally and stop at ``max_output_bytes``.
+    """
+
+    def __init__(
+        self,
+        root: str | Path = ".",
+        index: WorkspaceIndex | None = None,
+        max_output_bytes: int = 256 * 1024,
+    ):
         self.root = Path(root).resolve()
+        self.index = index
+        self.max_output_bytes = max_output_bytes
+        self._status: Optional[Tuple[tuple, Dict[str, Any]]] = None
+
+    # ---------- status cache ----------
+    def _git_dir(self) -> Path:
+        dot_git = self.root / ".git"
+        if dot_git.is_file():  # worktrees and submodules
+            text = dot_git.read_text(errors="replace").strip()
+            if text.startswith("gitdir: "):
+                return (self.root / text[len("gitdir: "):]).resolve()
+        return dot_git
+
+    def _status_key(self) -> Optional[tuple]:
+        """What ``git status`` output depends on, cheaply; None disables caching.
+
+        Blocking (it may refresh the workspace index): async callers run it in a thread.
+        """
+        if self.index is None:
+            return None
+        git_dir = self._git_dir()
+        try:
+            head = (git_dir / "HEAD").read_text(errors="replace").strip()
+        except OSError:
+            return None
+        watched = ["index", "packed-refs"]
+        if head.startswith("ref: "):
+            watched.append(head[len("ref: "):])
+        stats: list = []
+        for name in watched:
+            try:
+                st = os.stat(git_dir / name)
+                stats.append((st.st_size, st.st_mtime_ns))
+            except OSError:
+                stats.append(None)
+        return (head, self.index.fingerprint(), *stats)
+
+    def _cached_status(self) -> Tuple[Optional[tuple], Optional[Dict[str, Any]]]:
+        key = self._status_key()
+        if key is not None and self._status is not None and self._status[0] == key:
+            log.debug("git status cache hit")
+            return key, self._status[1]
+        return key, None
 
-    def _run(self, args: list[str]) -> Dict[str, Any]:
+    def _store_status(self, before: Optional[tuple], result: Dict[str, Any]) -> Dict[str, Any]:
+        if result["success"]:
+            result = {"success": True, "stdout": render_status(result["stdout"])}
+            # Only cache when nothing changed while status ran (it may refresh the index).
+            after = self._status_key()
+            if before is not None and after is not None and before[:2] == after[:2]:
+                self._status = (after, result)
+        return result
+
+    # ---------- synchronous wrappers ----------
+    def _run(self, args: list[str], stdin: bytes | None = None) -> Dict[str, Any]:
         log.debug("git cmd", args=args, cwd=str(self.root))
         try:
             res = subprocess.run(
                 ["git"] + args,
                 cwd=self.root,
+                input=stdin,
                 capture_output=True,
-                text=True,
                 check=True,
             )
-            return {"success": True, "stdout": res.stdout.strip()}
+            return {"success": True, "stdout": res.stdout.decode(errors="replace").strip("\n ")}
         except subprocess.CalledProcessError as exc:
-            log.warning("git failed", args=args, returncode=exc.returncode, stderr=exc.stderr)
-            return {"success": False, "stderr": exc.stderr.strip()}
+            err = _failure_text(exc.stdout, exc.stderr)
+            log.warning("git failed", args=args, returncode=exc.returncode, stderr=err)
+            return {"success": False, "stderr": err}
+
+    def _stream(self, args: list[str]) -> Dict[str, Any]:
+        """Run a read-only command, reading stdout until ``max_output_bytes``."""
+        log.debug("git cmd", args=args, cwd=str(self.root))
+        out, truncated = bytearray(), False
+        with tempfile.TemporaryFile() as err_file:
+            proc = subprocess.Popen(["git"] + args, cwd=self.root, stdout=subprocess.PIPE, stderr=err_file)
+            try:
+                while chunk := proc.stdout.read(STREAM_CHUNK):
+                    out += chunk
+                    if len(out) > self.max_output_bytes:
+                        truncated = True
+                        break
+            finally:
+                if proc.poll() is None and truncated:
+                    proc.kill()
+                proc.stdout.close()
+                proc.wait()
+            err_file.seek(0)
+            err = err_file.read().decode(errors="replace")
+        if proc.returncode != 0 and not truncated:
+            log.warning("git failed", args=args, returncode=proc.returncode, stderr=err)
+            return {"success": False, "stderr": err.strip()}
+        return {"success": True, "stdout": _capped(bytes(out), self.max_output_bytes, truncated)}
 
     def status(self) -> Dict[str, Any]:
-        return self._run(["status", "--short"])
+        key, cached = self._cached_status()
+        if cached is not None:
+            return cached
+        return self._store_status(key, self._run(STATUS_ARGS))
 
-    def add(self, path: str) -> Dict[str, Any]:
-        return self._run(["add", path])
+    def add(self, *paths: str) -> Dict[str, Any]:
+        """Stage any number of paths with one ``git add``."""
+        if not paths:
+            return {"success": False, "stderr": "add needs at least one path"}
+        self._status = None
+        return self._run(ADD_ARGS, stdin="\0".join(paths).encode())
 
     def commit(self, message: str) -> Dict[str, Any]:
+        self._status = None
         return self._run(["commit", "-m", message])
+
+    def diff(self, *args: str) -> Dict[str, Any]:
+        return self._stream(_diff_args(args))
+
+    def log(self, *args: str) -> Dict[str, Any]:
+        return self._stream(_log_args(args))
+
+
+class AsyncGitTool(GitTool):
+    """Async variant of :class:`GitTool` that does not block the event loop."""
+
+    async def _run(self, args: list[str], stdin: bytes | None = None) -> Dict[str, Any]:
+        log.debug("git cmd", args=args, cwd=str(self.root))
+        proc = await asyncio.create_subprocess_exec(
+            "git",
+            *args,
+            cwd=self.root,
+            stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await proc.communicate(stdin)
+        finally:
+            if proc.returncode is None:  # cancelled, e.g. by the tool deadline
+                proc.kill()
+        if proc.returncode != 0:
+            err = _failure_text(stdout, stderr)
+            log.warning("git failed", args=args, returncode=proc.returncode, stderr=err)
+            return {"success": False, "stderr": err}
+        return {"success": True, "stdout": stdout.decode(errors="replace").strip("\n ")}
+
+    async def _stream(self, args: list[str]) -> Dict[str, Any]:
+        log.debug("git cmd", args=args, cwd=str(self.root))
+        proc = await asyncio.create_subprocess_exec(
+            "git",
+            *args,
+            cwd=self.root,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        errors = asyncio.ensure_future(proc.stderr.read())
+        out, truncated = bytearray(), False
+        try:
+            while chunk := await proc.stdout.read(STREAM_CHUNK):
+                out += chunk
+                if len(out) > self.max_output_bytes:
+                    truncated = True
+                    proc.kill()
+                    break
+            err = (await errors).decode(errors="replace")
+            await proc.wait()
+        except BaseException:  # cancelled, e.g. by the tool deadline
+            if proc.returncode is None:
+                proc.kill()
+            errors.cancel()
+            raise
+        if proc.returncode != 0 and not truncated:
+            log.warning("git failed", args=args, returncode=proc.returncode, stderr=err)
+            return {"success": False, "stderr": err.strip()}
+        return {"success": True, "stdout": _capped(bytes(out), self.max_output_bytes, truncated)}
+
+    async def status(self) -> Dict[str, Any]:
+        key, cached = await asyncio.to_thread(self._cached_status)
+        if cached is not None:
+            return cached
+        result = await self._run(STATUS_ARGS)
+        return await asyncio.to_thread(self._store_status, key, result)
+
+    async def add(self, *paths: str) -> Dict[str, Any]:
+        if not paths:
+            return {"success": False, "stderr": "add needs at least one path"}
+        self._status = None
+        return await self._run(ADD_ARGS, stdin="\0".join(paths).encode())
+
+    async def commit(self, message: str) -> Dict[str, Any]:
+        self._status = None
+        return await self._run(["commit", "-m", message])
+
+    async def diff(self, *args: str) -> Dict[str, Any]:
+        return await self._stream(_diff_args(args))
+
+    async def log(self, *args: str) -> Dict[str, Any]:
+        return await self._stream(_log_args(args))
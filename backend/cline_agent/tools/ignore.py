@@ -0,0 +1,103 @@
+"""Minimal .gitignore matching for workspace scans."""
+from __future__ import annotations
+
+import posixpath
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from .workspace_index import glob_regex
+
+
+class _Rule:
+    __slots__ = ("base", "regex", "negate", "dir_only")
+
+    def __init__(self, base: str, regex: re.Pattern, negate: bool, dir_only: bool):
+        self.base = base
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+
+
+def _parse(base: str, text: str) -> List[_Rule]:
+    rules = []
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        if line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # A slash anywhere but the end anchors the pattern to its .gitignore.
+        if "/" in line:
+            pattern = line.lstrip("/")
+        else:
+            pattern = "**/" + line
+        rules.append(_Rule(base, glob_regex(pattern), negate, dir_only))
+    return rules
+
+
+class GitIgnore:
+    """Rules from every ``.gitignore`` in a tree; later and deeper rules win.
+
+    Supports comments, ``!`` negation, trailing-``/`` directory patterns,
+    anchored patterns and ``**``. A path is ignored when it or any parent
+    directory is.
+    """
+
+    def __init__(self, rules: List[_Rule]):
+        self.rules = rules
+        self._dirs: Dict[str, bool] = {}
+
+    @classmethod
+    def load(cls, root: str | Path, ignore_files: Iterable[str]) -> "GitIgnore":
+        """Build from the ``.gitignore`` paths (relative to ``root``) found by a scan."""
+        root = Path(root)
+        rules: List[_Rule] = []
+        # Shallow files first so nested .gitignore rules override them.
+        for rel in sorted(ignore_files, key=lambda p: (p.count("/"), p)):
+            try:
+                text = (root / rel).read_text(errors="replace")
+            except OSError:
+                continue
+            rules.extend(_parse(posixpath.dirname(rel), text))
+        return cls(rules)
+
+    def _match(self, rel: str, is_dir: bool) -> bool:
+        ignored = False
+        for rule in self.rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.base:
+                if not rel.startswith(rule.base + "/"):
+                    continue
+                local = rel[len(rule.base) + 1 :]
+            else:
+                local = rel
+            if rule.regex.match(local):
+                ignored = not rule.negate
+        return ignored
+
+    def _dir_ignored(self, rel: str) -> bool:
+        if not rel:
+            return False
+        cached = self._dirs.get(rel)
+        if cached is None:
+            cached = self._dir_ignored(posixpath.dirname(rel)) or self._match(rel, True)
+            self._dirs[rel] = cached
+        return cached
+
+    def ignored(self, rel: str) -> bool:
+        """Whether the file at ``rel`` is ignored."""
+        if not self.rules:
+            return False
+        return self._dir_ignored(posixpath.dirname(rel)) or self._match(rel, False)
+
+    def filter(self, paths: Iterable[Tuple[str, int, int]]) -> List[Tuple[str, int, int]]:
+        return [entry for entry in paths if not self.ignored(entry[0])]
@@ -1,27 +1,131 @@
 from __future__ import annotations
 
+import asyncio
+import importlib.util
+import random
+import time
+
 import httpx
 import structlog
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional, Sequence, Tuple
 
 log = structlog.get_logger(__name__)
 
+# Statuses worth retrying: the server asked us to back off or is briefly down.
+RETRY_STATUSES = {429, 502, 503, 504}
+# Errors raised before the request reached the server; safe to retry even for invoke.
+NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+MAX_RETRY_AFTER_S = 5.0
+
+MCPCall = Tuple[str, str, Dict[str, Any]]
+
 
-class MCPClient:
-    """Thin HTTP client for external MCP servers (e.g. shadcn/ui)."""
+class AsyncMCPClient:
+    """HTTP client for external MCP servers (e.g. shadcn/ui) on a pooled ``httpx.AsyncClient``.
 
-    def __init__(self, base_url: str):
+    Connections are kept alive (HTTP/2 when the ``h2`` package is installed),
+    ``/mcp/discover`` is cached for ``discover_ttl`` seconds and then
+    revalidated with its ETag, and transient failures are retried with
+    jittered exponential backoff. ``invoke`` is only retried when the request
+    was never sent or the server refused it (429/503), so an action is not
+    applied twice. Pass ``transport`` (e.g. ``httpx.ASGITransport``) to talk
+    to an in-process stand-in server.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 10.0,
+        retries: int = 2,
+        backoff_s: float = 0.2,
+        discover_ttl: float = 300.0,
+        max_connections: int = 20,
+        http2: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
         self.base_url = base_url.rstrip("/")
-        self.client = httpx.Client(base_url=self.base_url, timeout=10.0)
-        log.debug("MCPClient init", base_url=self.base_url)
+        if http2 is None:
+            http2 = importlib.util.find_spec("h2") is not None
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            http2=http2,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+        self.retries = max(0, retries)
+        self.backoff_s = backoff_s
+        self.discover_ttl = discover_ttl
+        self._discovered: Optional[Tuple[float, Optional[str], List[Dict[str, Any]]]] = None
+        self._discover_lock = asyncio.Lock()
+        self._batch_endpoint: Optional[bool] = None  # unknown until first invoke_many
+        self.stats = {"requests": 0, "retries": 0, "discover_hits": 0, "discover_revalidated": 0}
+        log.debug("AsyncMCPClient init", base_url=self.base_url, http2=http2)
 
-    def discover(self) -> List[Dict[str, Any]]:
-        resp = self.client.get("/mcp/discover")
-        resp.raise_for_status()
-        return resp.json()
+    def _delay(self, attempt: int, resp: Optional[httpx.Response]) -> float:
+        retry_after = resp.headers.get("retry-after") if resp is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_AFTER_S)
+        return random.uniform(0, self.backoff_s * 2**attempt)  # full jitter
 
-    def invoke(self, tool: str, action: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    async def _request(self, method: str, url: str, idempotent: bool, **kwargs: Any) -> httpx.Response:
+        retryable = (httpx.TransportError,) if idempotent else NOT_SENT
+        statuses = RETRY_STATUSES if idempotent else {429, 503}
+        for attempt in range(self.retries + 1):
+            resp = None
+            self.stats["requests"] += 1
+            try:
+                resp = await self.client.request(method, url, **kwargs)
+                if resp.status_code not in statuses or attempt == self.retries:
+                    return resp
+            except retryable as exc:
+                if attempt == self.retries:
+                    raise
+                log.debug("mcp.retry", url=url, attempt=attempt + 1, error=type(exc).__name__)
+            self.stats["retries"] += 1
+            await asyncio.sleep(self._delay(attempt, resp))
+        raise AssertionError("unreachable")
+
+    async def discover(self) -> List[Dict[str, Any]]:
+        async with self._discover_lock:
+            cached = self._discovered
+            if cached is not None and time.monotonic() - cached[0] < self.discover_ttl:
+                self.stats["discover_hits"] += 1
+                return cached[2]
+            headers = {"If-None-Match": cached[1]} if cached is not None and cached[1] else {}
+            resp = await self._request("GET", "/mcp/discover", idempotent=True, headers=headers)
+            if resp.status_code == 304 and cached is not None:
+                self.stats["discover_revalidated"] += 1
+                self._discovered = (time.monotonic(), cached[1], cached[2])
+                return cached[2]
+            resp.raise_for_status()
+            tools = resp.json()
+            self._discovered = (time.monotonic(), resp.headers.get("etag"), tools)
+            return tools
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def invoke(self, tool: str, action: str, args: Dict[str, Any]) -> Dict[str, Any]:
         payload = {"tool": tool, "action": action, "args": args}
-        resp = self.client.post("/mcp/invoke", json=payload)
+        resp = await self._request("POST", "/mcp/invoke", idempotent=False, json=payload)
         resp.raise_for_status()
         return resp.json()
+
+    async def invoke_many(self, calls: Sequence[MCPCall]) -> List[Any]:
+        """Invoke several actions; each result is the response JSON or the exception raised.
+
+        Uses one ``POST /mcp/invoke_many`` when the server has it (remembered
+        after the first 404/405), otherwise concurrent ``invoke`` calls.
+        """
+        if self._batch_endpoint is not False and len(calls) > 1:
+            payload = {"calls": [{"tool": t, "action": a, "args": args} for t, a, args in calls]}
+            resp = await self._request("POST", "/mcp/invoke_many", idempotent=False, json=payload)
+            if resp.status_code in (404, 405):
+                self._batch_endpoint = False
+                log.debug("mcp.invoke_many.unsupported", base_url=self.base_url)
+            else:
+                resp.raise_for_status()
+                self._batch_endpoint = True
+                return list(resp.json()["results"])
+        return list(await asyncio.gather(*(self.invoke(*call) for call in calls), return_exceptions=True))
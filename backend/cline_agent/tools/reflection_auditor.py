@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import random
 import structlog
-from typing import Optional
+from pydantic import BaseModel, ValidationError
+from typing import Any, Dict, Optional, Set
 
 from ..llm.providers import LLMRouter
 from ..tools.schemas import ExecutionResult
@@ -17,16 +20,100 @@ Given the original task, the executed plan, and the output, decide:
 Return JSON only:
 {"success": bool, "retry": bool, "notes": str}"""
 
+# Failures no revised plan can fix: stop instead of retrying.
+FATAL_ERRORS = ("Sandbox escape detected", "PermissionError")
+# Failures a revised plan usually fixes (wrong path, command or arguments).
+PLAN_ERRORS = (
+    "FileNotFoundError",
+    "No such file or directory",
+    "is not a directory",
+    "Unknown command",
+    "Unknown tool",
+    "did not match any files",
+    "ValidationError",
+)
+
+Verdict = tuple[bool, bool, str]
+
+
+class Critique(BaseModel):
+    success: bool
+    retry: bool
+    notes: str = ""
+
+
+def pre_critique(result: ExecutionResult) -> Optional[tuple[str, Verdict]]:
+    """Settle clear-cut outcomes without the LLM; returns (rule, verdict) or None.
+
+    Clear success: every step ran and succeeded with nothing on stderr.
+    Clear failure: every failed step hit a known error class.
+    """
+    if not result.steps:
+        return "empty_plan", (False, True, "The plan has no steps.")
+    failed = [s for s in result.steps if not s.success and not s.skipped]
+    if not failed:
+        if result.success and not any(s.skipped or s.stderr for s in result.steps):
+            return "all_succeeded", (True, False, f"All {len(result.steps)} steps succeeded without errors.")
+        return None
+
+    def first(step, markers):
+        return next((m for m in markers if m in (step.stderr or "")), None)
+
+    fatal = [(s, m) for s in failed if (m := first(s, FATAL_ERRORS))]
+    if fatal:
+        step, marker = fatal[0]
+        return "fatal_error", (False, False, f"Step {step.index + 1} ({step.tool}.{step.command}) failed: {marker}.")
+    if all(first(s, PLAN_ERRORS) for s in failed):
+        reasons = "; ".join(f"step {s.index + 1}: {first(s, PLAN_ERRORS)}" for s in failed)
+        return "plan_error", (False, True, f"Fix the plan: {reasons}.")
+    return None
+
 
 class ReflectionAuditor:
-    def __init__(self, router: LLMRouter):
+    """LLM self-critique of an execution, behind a rule-based pre-critic.
+
+    Outcomes :func:`pre_critique` can settle skip the model; the rest are
+    sent to it in JSON mode. A ``shadow_rate`` share of local verdicts is
+    also sent to the model in the background to measure how often the two
+    agree.
+    """
+
+    def __init__(self, router: LLMRouter, fast_path: bool = True, shadow_rate: float = 0.05):
         self.router = router
+        self.fast_path = fast_path
+        self.shadow_rate = shadow_rate
+        self._shadows: Set[asyncio.Task] = set()
+        self.counters: Dict[str, Any] = {
+            "critiques": 0,
+            "local": 0,
+            "llm": 0,
+            "parse_errors": 0,
+            "shadow_samples": 0,
+            "shadow_agreed": 0,
+            "rules": {},
+        }
 
-    def critique(
+    async def critique(
         self, task: str, plan_json: str, result: ExecutionResult
     ) -> tuple[bool, bool, str]:
+        self.counters["critiques"] += 1
+        local = pre_critique(result) if self.fast_path else None
+        if local is None:
+            self.counters["llm"] += 1
+            return await self._llm_critique(task, plan_json, result)
+
+        rule, verdict = local
+        self.counters["local"] += 1
+        self.counters["rules"][rule] = self.counters["rules"].get(rule, 0) + 1
+        log.debug("reflection.local", rule=rule, success=verdict[0], retry=verdict[1])
+        if random.random() < self.shadow_rate:
+            shadow = asyncio.ensure_future(self._shadow(rule, verdict, task, plan_json, result))
+            self._shadows.add(shadow)
+            shadow.add_done_callback(self._shadows.discard)
+        return verdict
+
+    async def _llm_critique(self, task: str, plan_json: str, result: ExecutionResult) -> Verdict:
         client = self.router.for_phase("fallback")  # cheaper / faster model
-        client.response_model = None
         messages = [
             {"role": "system", "content": REFLECTION_SYSTEM},
             {
@@ -34,10 +121,39 @@ class ReflectionAuditor:
                 "content": f"Task: {task}\nPlan: {plan_json}\nResult: {result.model_dump_json()}",
             },
         ]
-        raw = client.generate(messages, temperature=0.2, max_tokens=200)
         try:
-            data = json.loads(raw)
-            return data["success"], data["retry"], data["notes"]
-        except Exception:
-            log.warning("Reflection parse failed", raw=raw)
+            data = await client.generate_structured(
+                messages, response_model=Critique, temperature=0.2, max_tokens=200
+            )
+        except (ValidationError, json.JSONDecodeError) as exc:
+            self.counters["parse_errors"] += 1
+            log.warning("Reflection parse failed", error=str(exc))
             return result.success, False, "Parse error – assume success"
+        return data.success, data.retry, data.notes
+
+    async def _shadow(self, rule: str, verdict: Verdict, task: str, plan_json: str, result: ExecutionResult) -> None:
+        try:
+            success, retry, notes = await self._llm_critique(task, plan_json, result)
+        except Exception as exc:
+            log.debug("reflection.shadow.failed", error=str(exc))
+            return
+        agreed = (success, retry) == verdict[:2]
+        self.counters["shadow_samples"] += 1
+        self.counters["shadow_agreed"] += agreed
+        if not agreed:
+            log.info("reflection.shadow.disagreed", rule=rule, local=verdict[:2],
+                     llm=(success, retry), notes=notes)
+
+    def stats(self) -> Dict[str, Any]:
+        c = self.counters
+        return {
+            **c,
+            "rules": dict(c["rules"]),
+            "skip_rate": round(c["local"] / c["critiques"], 3) if c["critiques"] else None,
+            "agreement_rate": round(c["shadow_agreed"] / c["shadow_samples"], 3) if c["shadow_samples"] else None,
+        }
+
+    async def aclose(self) -> None:
+        """Wait for in-flight shadow critiques."""
+        if self._shadows:
+            await asyncio.gather(*self._shadows, return_exceptions=True)
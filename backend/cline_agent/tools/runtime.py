@@ -0,0 +1,171 @@
+"""Tool runtime: registered tools with deadlines, concurrency bounds and output caps."""
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import structlog
+
+from ..metrics import LatencyWindow
+
+log = structlog.get_logger(__name__)
+
+
+class ToolError(Exception):
+    """Base class for errors raised by the runtime itself (not by a tool)."""
+
+
+class ToolNotFoundError(ToolError):
+    pass
+
+
+class ToolTimeoutError(ToolError):
+    pass
+
+
+class ToolSpec:
+    """A registered tool, its limits and its counters."""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        timeout: float = 30.0,
+        max_concurrency: int = 4,
+        max_output_bytes: int = 256 * 1024,
+        is_async: Optional[bool] = None,
+    ):
+        self.name = name
+        self.fn = fn
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_output_bytes = max_output_bytes
+        self.is_async = inspect.iscoroutinefunction(fn) if is_async is None else is_async
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.latency = LatencyWindow()
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.truncated = 0
+        self.in_flight = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "async": self.is_async,
+            "timeout_s": self.timeout,
+            "max_concurrency": self.max_concurrency,
+            "max_output_bytes": self.max_output_bytes,
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "truncated": self.truncated,
+            "in_flight": self.in_flight,
+            "latency": self.latency.snapshot(),
+        }
+
+
+def _truncate(text: str, limit: int) -> str:
+    raw = text.encode()
+    if len(raw) <= limit:
+        return text
+    return raw[:limit].decode(errors="ignore") + f"\n… [truncated {len(raw) - limit} bytes]"
+
+
+def cap_output(output: Any, limit: int) -> tuple[Any, bool]:
+    """Bound the serialized size of a tool result; returns (output, truncated).
+
+    ``stdout``/``stderr`` of tool dicts and plain strings are cut with a
+    marker. Other values that serialize above ``limit`` are replaced by a
+    preview of their JSON. Lists (batch results) are capped item by item.
+    """
+    if isinstance(output, list):
+        items = [item if isinstance(item, BaseException) else cap_output(item, limit) for item in output]
+        capped = [item if isinstance(item, BaseException) else item[0] for item in items]
+        return capped, any(not isinstance(item, BaseException) and item[1] for item in items)
+    if isinstance(output, str):
+        capped = _truncate(output, limit)
+        return capped, capped is not output
+    if isinstance(output, dict) and ("stdout" in output or "stderr" in output):
+        capped = dict(output)
+        for field in ("stdout", "stderr"):
+            if isinstance(capped.get(field), str):
+                capped[field] = _truncate(capped[field], limit)
+        changed = any(capped.get(f) is not output.get(f) for f in ("stdout", "stderr"))
+        return (capped, True) if changed else (output, False)
+    try:
+        serialized = json.dumps(output, default=str)
+    except (TypeError, ValueError):
+        return output, False
+    if len(serialized) <= limit:
+        return output, False
+    return {"truncated": True, "bytes": len(serialized), "preview": serialized[:limit]}, True
+
+
+class ToolRuntime:
+    """Run registered tools with per-tool deadlines, concurrency limits and output caps.
+
+    Sync tools run on a bounded thread pool (shared when ``executor`` is
+    passed in), so a slow tool never blocks the event loop. A timed-out sync
+    tool cannot be interrupted; its thread finishes in the background.
+    """
+
+    def __init__(self, max_workers: int = 8, executor: ThreadPoolExecutor | None = None):
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self.tools: Dict[str, ToolSpec] = {}
+
+    def register(self, name: str, fn: Callable[..., Any] | None = None, **limits: Any):
+        """Register ``fn`` as ``name``; usable as a decorator when ``fn`` is omitted."""
+        if fn is None:
+            return lambda f: self.register(name, f, **limits)
+        self.tools[name] = ToolSpec(name, fn, **limits)
+        return fn
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.tools
+
+    async def call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        spec = self.tools.get(name)
+        if spec is None:
+            raise ToolNotFoundError(f"Tool '{name}' not found.")
+
+        async with spec.semaphore:
+            spec.calls += 1
+            spec.in_flight += 1
+            started = time.perf_counter()
+            try:
+                if spec.is_async:
+                    pending = spec.fn(*args, **kwargs)
+                else:
+                    loop = asyncio.get_running_loop()
+                    pending = loop.run_in_executor(self.executor, functools.partial(spec.fn, *args, **kwargs))
+                output = await asyncio.wait_for(pending, timeout=spec.timeout)
+            except asyncio.TimeoutError:
+                spec.timeouts += 1
+                spec.errors += 1
+                log.warning("tool.timeout", tool=name, timeout_s=spec.timeout)
+                raise ToolTimeoutError(f"Tool '{name}' timed out after {spec.timeout:g}s") from None
+            except Exception:
+                spec.errors += 1
+                raise
+            finally:
+                spec.in_flight -= 1
+                spec.latency.record(time.perf_counter() - started)
+
+        output, truncated = cap_output(output, spec.max_output_bytes)
+        if truncated:
+            spec.truncated += 1
+            log.info("tool.output.truncated", tool=name, limit=spec.max_output_bytes)
+        return output
+
+    def metrics(self) -> Dict[str, Any]:
+        return {name: spec.stats() for name, spec in self.tools.items()}
+
+    def close(self) -> None:
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,16 +1,84 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import posixpath
 import re
 import subprocess
+import threading
+from collections import OrderedDict
 import structlog
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .schemas import ExecutionResult, Plan, PlanStep
 
 log = structlog.get_logger(__name__)
 
+# Large write payloads are scanned in chunks this big, overlapping by
+# SCAN_OVERLAP so a match straddling a boundary is still seen.
+SCAN_CHUNK = 256 * 1024
+SCAN_OVERLAP = 1024
+LINT_SUFFIXES = (".py", ".pyi")
+
+
+class Rule(NamedTuple):
+    """A deny pattern and a lowercase literal every match must contain."""
+
+    literal: str
+    pattern: re.Pattern
+
+
+# Each rule only runs when its literal occurs (substring search is far
+# cheaper than the regexes); pick the rarest literal a match requires.
+RULES: Tuple[Rule, ...] = tuple(
+    Rule(literal, re.compile(pattern, re.I))
+    for literal, pattern in (
+        ("-rf", r"rm\s+-rf\s+/"),
+        ("/dev/zero", r"dd\s+if=/dev/zero"),
+        (":(", r":\(\)\{.*:\|.*:.*\}&"),
+        ("chmod", r"chmod\s+777"),
+        ("eval", r"eval\s*\("),
+        ("exec", r"exec\s*\("),
+        ("os.system", r"os\.system"),
+        ("subprocess.call", r"subprocess\.call"),
+    )
+)
+
+
+def scan_text(text: str) -> List[str]:
+    """Deny-pattern matches in ``text``, scanned in chunks."""
+    hits: List[str] = []
+    for start in range(0, max(len(text), 1), SCAN_CHUNK):
+        chunk = text[start : start + SCAN_CHUNK + SCAN_OVERLAP]
+        # re.I also folds some non-ASCII letters onto ASCII ones (``ſ`` matches
+        # ``s``), which a literal search would miss: only prefilter ASCII text.
+        lowered = chunk.lower() if chunk.isascii() else None
+        for rule in RULES:
+            if lowered is None or rule.literal in lowered:
+                # Matches starting in the overlap are reported by the next chunk.
+                hits.extend(m.group(0) for m in rule.pattern.finditer(chunk) if m.start() < SCAN_CHUNK)
+    return hits
+
+
+def _step_key(step: PlanStep) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for part in (step.tool, step.command, *step.args):
+        data = part.encode("utf-8", errors="surrogatepass")
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.digest()
+
 
 class SafetyAuditor:
-    """Two-tier audit: fast static regex + LLM-based semantic check."""
+    """Two-tier audit: fast static regex + LLM-based semantic check.
+
+    Plans are audited step by step on the raw arguments (JSON escaping
+    cannot hide a pattern), and each step's verdict is cached by content
+    hash, so a refined plan only pays for the steps that changed. Written
+    Python files are linted in one ruff run, also cached by content hash.
+    """
 
     # Dangerous command patterns - removed problematic word boundaries
     STATIC_DENY = re.compile(
@@ -18,24 +86,153 @@ class SafetyAuditor:
         re.I,
     )
 
+    def __init__(self, max_cached_steps: int = 4096):
+        self.max_cached_steps = max_cached_steps
+        self._verdicts: OrderedDict[bytes, Tuple[str, ...]] = OrderedDict()
+        self._lints: OrderedDict[Tuple[str, str], Tuple[str, ...]] = OrderedDict()
+        self._ruff_missing = False
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "steps": 0, "cached": 0, "bytes_scanned": 0, "files_linted": 0, "lint_cached": 0,
+        }
+
     def audit(self, content: str) -> Tuple[bool, List[str]]:
         """Returns (safe, list-of-reasons)."""
-        hits = self.STATIC_DENY.findall(content)
+        hits = scan_text(content)
         if hits:
             return False, [f"Static blocklist hit: {h}" for h in hits]
         return True, []
 
+    def _audit_step(self, step: PlanStep) -> Tuple[str, ...]:
+        key = _step_key(step)
+        with self._lock:
+            self.stats["steps"] += 1
+            hits = self._verdicts.get(key)
+            if hits is not None:
+                self._verdicts.move_to_end(key)
+                self.stats["cached"] += 1
+                return hits
+        hits = tuple(hit for arg in step.args for hit in scan_text(arg))
+        with self._lock:
+            self.stats["bytes_scanned"] += sum(len(arg) for arg in step.args)
+            self._verdicts[key] = hits
+            if len(self._verdicts) > self.max_cached_steps:
+                self._verdicts.popitem(last=False)
+        return hits
+
+    def audit_plan(self, plan: Plan) -> Tuple[bool, List[str]]:
+        """Audit every step's arguments; returns (safe, list-of-reasons)."""
+        reasons = [
+            f"Step {i} ({step.tool}.{step.command}): static blocklist hit: {hit}"
+            for i, step in enumerate(plan.steps, 1)
+            for hit in self._audit_step(step)
+        ]
+        return not reasons, reasons
+
+    # ---------- linting ----------
     def lint_file(self, path: Path) -> Tuple[bool, List[str]]:
         """Run ruff on a Python file."""
+        path = Path(path)
+        issues = self.lint_files(path.parent, [path.name]).get(path.name, [])
+        return not issues, [f"Lint: {issue}" for issue in issues]
+
+    def lint_files(self, root: str | Path, paths: Sequence[str]) -> Dict[str, List[str]]:
+        """Lint ``paths`` (relative to ``root``) with one ruff run; returns issues per path.
+
+        Results are cached by path and content hash, so unchanged files are
+        never relinted. Missing files are skipped; without ruff every file is
+        reported clean.
+        """
+        root = Path(root).resolve()
+        results: Dict[str, List[str]] = {}
+        pending: Dict[str, Tuple[str, str]] = {}
+        for rel in dict.fromkeys(posixpath.normpath(p.replace("\\", "/")) for p in paths):
+            try:
+                digest = hashlib.sha256((root / rel).read_bytes()).hexdigest()
+            except OSError:
+                continue
+            with self._lock:
+                cached = self._lints.get((rel, digest))
+                if cached is not None:
+                    self._lints.move_to_end((rel, digest))
+            if cached is not None:
+                results[rel] = list(cached)
+            else:
+                pending[rel] = (rel, digest)
+
+        found = self._run_ruff(root, list(pending)) if pending else {}
+        for rel, key in pending.items():
+            issues = tuple(found.get(rel, ())) if found is not None else ()
+            results[rel] = list(issues)
+            if found is None:
+                continue  # ruff unavailable or failed: do not remember a verdict
+            with self._lock:
+                self._lints[key] = issues
+                if len(self._lints) > self.max_cached_steps:
+                    self._lints.popitem(last=False)
+        with self._lock:
+            self.stats["files_linted"] += len(pending)
+            self.stats["lint_cached"] += len(results) - len(pending)
+        return results
+
+    def _run_ruff(self, root: Path, paths: List[str]) -> Optional[Dict[str, List[str]]]:
+        if self._ruff_missing:
+            return None
         try:
             proc = subprocess.run(
-                ["ruff", "check", "--quiet", str(path)],
+                ["ruff", "check", "--output-format", "json", "--no-fix", "--", *paths],
+                cwd=root,
                 capture_output=True,
                 text=True,
             )
-            if proc.returncode == 0:
-                return True, []
-            return False, [f"Lint: {proc.stdout.strip()}"]
         except FileNotFoundError:
             log.warning("ruff not found – skipping lint")
-            return True, []
+            self._ruff_missing = True
+            return None
+        if proc.returncode not in (0, 1):
+            log.warning("ruff failed", returncode=proc.returncode, stderr=proc.stderr.strip())
+            return None
+        try:
+            diagnostics = json.loads(proc.stdout or "[]")
+        except ValueError:
+            log.warning("ruff output not JSON", stdout=proc.stdout[:200])
+            return None
+        found: Dict[str, List[str]] = {}
+        for diag in diagnostics:
+            rel = Path(os.path.relpath(diag["filename"], root)).as_posix()
+            loc = diag.get("location") or {}
+            found.setdefault(rel, []).append(
+                f"{rel}:{loc.get('row')}:{loc.get('column')}: {diag.get('code') or 'error'} {diag.get('message')}"
+            )
+        return found
+
+    def lint_plan(
+        self, plan: Plan, root: str | Path, result: ExecutionResult | None = None
+    ) -> Dict[str, Any]:
+        """Lint the Python files written by ``plan`` (by its successful steps,
+        given ``result``) in one batch; issues are mapped back to files and steps."""
+        succeeded = {s.index for s in result.steps if s.success} if result is not None else None
+        written = {
+            i: _python_writes(step)
+            for i, step in enumerate(plan.steps)
+            if succeeded is None or i in succeeded
+        }
+        files = self.lint_files(root, [p for paths in written.values() for p in paths])
+        steps = {
+            i: [issue for p in paths for issue in files.get(posixpath.normpath(p), [])]
+            for i, paths in written.items()
+            if paths
+        }
+        return {
+            "clean": not any(files.values()),
+            "files": files,
+            "steps": {i: issues for i, issues in steps.items() if issues},
+        }
+
+
+def _python_writes(step: PlanStep) -> List[str]:
+    """Paths of Python files a step writes."""
+    if step.tool != "file_system" or step.command not in ("write", "write_many"):
+        return []
+    paths = step.args[:1] if step.command == "write" else step.args[::2]
+    return [p for p in paths if p.endswith(LINT_SUFFIXES)]
@@ -1,7 +1,16 @@
 from __future__ import annotations
 
-from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, FrozenSet, List, Optional, Literal
+
+# Commands the planner may use per tool; None means any (MCP tool names).
+ALLOWED_COMMANDS: Dict[str, Optional[FrozenSet[str]]] = {
+    "file_system": frozenset({
+        "read", "write", "read_many", "write_many", "list_dir", "tree", "glob", "search",
+    }),
+    "git": frozenset({"status", "add", "commit", "diff", "log"}),
+    "mcp": None,
+}
 
 
 class PlanStep(BaseModel):
@@ -9,12 +18,38 @@ class PlanStep(BaseModel):
     command: str
     args: List[str] = Field(default_factory=list)
 
+    @model_validator(mode="after")
+    def _check_command(self) -> "PlanStep":
+        allowed = ALLOWED_COMMANDS.get(self.tool)
+        if self.command.startswith("_") or (allowed is not None and self.command not in allowed):
+            raise ValueError(
+                f"Unknown command {self.tool}.{self.command}; allowed: {sorted(allowed or [])}"
+            )
+        return self
+
 
 class Plan(BaseModel):
     steps: List[PlanStep]
 
 
+class StepResult(BaseModel):
+    index: int
+    tool: str
+    command: str
+    args: List[str] = Field(default_factory=list)
+    success: bool
+    stdout: Optional[str] = None
+    stderr: Optional[str] = None
+    depends_on: List[int] = Field(default_factory=list)
+    skipped: bool = False  # a dependency failed, the tool was not run
+    reused: bool = False  # result carried over from an earlier attempt
+    started_ms: float = 0.0  # offset from the start of the execution
+    duration_ms: float = 0.0
+
+
 class ExecutionResult(BaseModel):
     success: bool
     stdout: Optional[str] = None
     stderr: Optional[str] = None
+    steps: List[StepResult] = Field(default_factory=list)
+    duration_ms: Optional[float] = None
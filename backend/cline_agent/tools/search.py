@@ -0,0 +1,109 @@
+"""Parallel regex / literal content search over indexed workspace files."""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Optional, Sequence, Tuple
+
+import structlog
+
+log = structlog.get_logger(__name__)
+
+BINARY_SNIFF_BYTES = 8192
+MAX_LINE_CHARS = 240
+# Below this many files the search runs in-process: pickling and IPC would cost more.
+PARALLEL_MIN_FILES = 256
+CHUNK_FILES = 128
+
+Match = Tuple[str, int, str]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _search_pool() -> ProcessPoolExecutor:
+    """One process pool per server process, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the server process runs threads and an event loop.
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, (os.cpu_count() or 2) - 1),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _search_chunk(
+    root: str, paths: Sequence[str], pattern: str, flags: int, limit: int
+) -> Tuple[List[Match], int, int]:
+    """Search ``paths``; returns (matches, binary files skipped, total matches seen)."""
+    regex = re.compile(pattern.encode(), flags)
+    matches: List[Match] = []
+    binary = total = 0
+    for rel in paths:
+        try:
+            with open(os.path.join(root, rel), "rb") as fh:
+                data = fh.read()
+        except OSError:
+            continue
+        if b"\0" in data[:BINARY_SNIFF_BYTES]:
+            binary += 1
+            continue
+        found = regex.search(data)
+        if found is None:
+            continue
+        # Line numbers are computed only for files that match.
+        line_no, counted = 1, 0
+        while found is not None:
+            pos = found.start()
+            line_no += data.count(b"\n", counted, pos)
+            counted = pos
+            start = data.rfind(b"\n", 0, pos) + 1
+            end = data.find(b"\n", pos)
+            end = len(data) if end < 0 else end
+            total += 1
+            if len(matches) < limit:
+                text = data[start:end].decode("utf-8", errors="replace").strip()
+                matches.append((rel, line_no, text[:MAX_LINE_CHARS]))
+            # One hit per line: resume on the next line.
+            found = regex.search(data, end + 1) if end < len(data) else None
+    return matches, binary, total
+
+
+def search_files(
+    root: str,
+    paths: Sequence[str],
+    pattern: str,
+    literal: bool = False,
+    ignore_case: bool = False,
+    max_matches: int = 200,
+) -> Tuple[List[Match], int, int]:
+    """Search ``paths`` under ``root``, across processes for larger file sets.
+
+    Returns (up to ``max_matches`` matches sorted by path and line, binary
+    files skipped, total matching lines).
+    """
+    expr = re.escape(pattern) if literal else pattern
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    re.compile(expr.encode(), flags)  # raise re.error here, not in a worker
+
+    if len(paths) < PARALLEL_MIN_FILES:
+        matches, binary, total = _search_chunk(root, paths, expr, flags, max_matches)
+    else:
+        pool = _search_pool()
+        chunks = [paths[i : i + CHUNK_FILES] for i in range(0, len(paths), CHUNK_FILES)]
+        pending = {pool.submit(_search_chunk, root, chunk, expr, flags, max_matches) for chunk in chunks}
+        matches, binary, total = [], 0, 0
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk_matches, chunk_binary, chunk_total = future.result()
+                matches.extend(chunk_matches)
+                binary += chunk_binary
+                total += chunk_total
+    matches.sort(key=lambda m: (m[0], m[1]))
+    return matches[:max_matches], binary, total
@@ -0,0 +1,320 @@
+"""In-process index of a project tree: listings, tree views, globs and a fingerprint."""
+from __future__ import annotations
+
+import hashlib
+import os
+import posixpath
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import structlog
+
+log = structlog.get_logger(__name__)
+
+# Directories that are listed by name but never descended into.
+SKIP_DIRS = {".git", "node_modules", "__pycache__", ".venv", "venv", ".next", ".cline-agent"}
+
+_MASK = (1 << 64) - 1
+
+
+def _entry_hash(rel: str, size: int, mtime_ns: int) -> int:
+    digest = hashlib.blake2b(f"{rel}\0{size}\0{mtime_ns}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def glob_regex(pattern: str) -> re.Pattern:
+    """Translate a glob (``*``, ``?``, ``[..]``, ``**``) over ``/``-separated paths."""
+    out, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end < 0:
+                out.append(re.escape("["))
+                i += 1
+            else:
+                body = pattern[i + 1 : end].replace("\\", "\\\\")
+                out.append("[^" + body[1:] + "]" if body.startswith("!") else "[" + body + "]")
+                i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(out) + r"\Z")
+
+
+class _Dir:
+    """One directory: sorted file names with parallel size/mtime arrays."""
+
+    __slots__ = ("mtime_ns", "names", "sizes", "mtimes", "subdirs")
+
+    def __init__(self, mtime_ns: int):
+        self.mtime_ns = mtime_ns
+        self.names: List[str] = []
+        self.sizes = array("q")
+        self.mtimes = array("q")
+        self.subdirs: List[str] = []
+
+    def find(self, name: str) -> int:
+        i = bisect_left(self.names, name)
+        return i if i < len(self.names) and self.names[i] == name else -1
+
+
+class WorkspaceIndex:
+    """Paths, sizes and mtimes of every file under ``root``.
+
+    Built once, then refreshed incrementally: every indexed directory is
+    stat'ed and only those whose mtime changed are re-listed (at most once
+    per ``min_interval`` seconds). Edits to existing files do not change a
+    directory's mtime, so writes made through the tools are reported with
+    :meth:`note_write`, and a full re-stat runs every ``full_rescan_interval``
+    seconds to catch outside edits. The fingerprint is an order-independent
+    sum of per-file hashes, updated in O(1) per change.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        min_interval: float = 1.0,
+        full_rescan_interval: float = 30.0,
+        skip_dirs: set[str] | None = None,
+    ):
+        self.root = Path(root).resolve()
+        self.min_interval = min_interval
+        self.full_rescan_interval = full_rescan_interval
+        self.skip_dirs = SKIP_DIRS if skip_dirs is None else skip_dirs
+        self._dirs: Dict[str, _Dir] = {}
+        self._digest = 0
+        self._files = 0
+        self._built = False
+        self._checked_at = 0.0
+        self._rescanned_at = 0.0
+        self._lock = threading.RLock()
+
+    # ---------- maintenance ----------
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.root, rel) if rel else str(self.root)
+
+    def _forget(self, rel: str) -> None:
+        """Drop ``rel`` and everything below it from the index."""
+        entry = self._dirs.pop(rel, None)
+        if entry is None:
+            return
+        for i, name in enumerate(entry.names):
+            self._digest = (self._digest - _entry_hash(posixpath.join(rel, name), entry.sizes[i], entry.mtimes[i])) & _MASK
+        self._files -= len(entry.names)
+        for sub in entry.subdirs:
+            self._forget(posixpath.join(rel, sub))
+
+    def _scan(self, rel: str, recurse: bool = True) -> None:
+        """(Re)list one directory, keeping known subdirectories unless they vanished."""
+        try:
+            it = os.scandir(self._abs(rel))
+            mtime_ns = os.stat(self._abs(rel)).st_mtime_ns
+        except OSError:
+            self._forget(rel)
+            return
+        old = self._dirs.get(rel)
+        files: List[Tuple[str, int, int]] = []
+        subdirs: List[str] = []
+        with it:
+            for de in it:
+                try:
+                    if de.is_dir(follow_symlinks=False):
+                        subdirs.append(de.name)
+                        continue
+                    st = de.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                files.append((de.name, st.st_size, st.st_mtime_ns))
+        files.sort()
+        subdirs.sort()
+
+        if old is not None:
+            for i, name in enumerate(old.names):
+                self._digest = (self._digest - _entry_hash(posixpath.join(rel, name), old.sizes[i], old.mtimes[i])) & _MASK
+            self._files -= len(old.names)
+            for gone in set(old.subdirs) - set(subdirs):
+                self._forget(posixpath.join(rel, gone))
+
+        entry = _Dir(mtime_ns)
+        for name, size, mtime in files:
+            entry.names.append(name)
+            entry.sizes.append(size)
+            entry.mtimes.append(mtime)
+            self._digest = (self._digest + _entry_hash(posixpath.join(rel, name), size, mtime)) & _MASK
+        entry.subdirs = subdirs
+        self._files += len(files)
+        self._dirs[rel] = entry
+
+        if recurse:
+            for sub in subdirs:
+                child = posixpath.join(rel, sub)
+                if sub not in self.skip_dirs and child not in self._dirs:
+                    self._scan(child)
+
+    def refresh(self, force: bool = False) -> None:
+        """Bring the index up to date (throttled unless ``force``)."""
+        with self._lock:
+            now = time.monotonic()
+            if not self._built:
+                started = time.perf_counter()
+                self._scan("")
+                self._built = True
+                self._checked_at = self._rescanned_at = now
+                log.info("workspace_index.built", root=str(self.root), files=self._files,
+                         dirs=len(self._dirs), ms=round((time.perf_counter() - started) * 1000, 1))
+                return
+            if not force and now - self._checked_at < self.min_interval:
+                return
+            full = force or now - self._rescanned_at >= self.full_rescan_interval
+            changed = 0
+            for rel in list(self._dirs):
+                entry = self._dirs.get(rel)
+                if entry is None:
+                    continue
+                try:
+                    mtime_ns = os.stat(self._abs(rel)).st_mtime_ns
+                except OSError:
+                    self._forget(rel)
+                    changed += 1
+                    continue
+                if full or mtime_ns != entry.mtime_ns:
+                    self._scan(rel)
+                    changed += 1
+            self._checked_at = now
+            if full:
+                self._rescanned_at = now
+            if changed:
+                log.debug("workspace_index.refreshed", changed_dirs=changed, full=full)
+
+    def note_write(self, rel: str) -> None:
+        """Record a file written through the tools without waiting for a rescan."""
+        rel = posixpath.normpath(rel.replace("\\", "/")).lstrip("/")
+        with self._lock:
+            if not self._built:
+                return
+            parent = posixpath.dirname(rel)
+            entry = self._dirs.get(parent)
+            if entry is None:
+                # New directories: rescan from the closest indexed ancestor.
+                while parent and parent not in self._dirs:
+                    parent = posixpath.dirname(parent)
+                if any(part in self.skip_dirs for part in rel.split("/")):
+                    return
+                self._scan(parent)
+                return
+            try:
+                st = os.stat(self._abs(rel))
+            except OSError:
+                self._scan(parent, recurse=False)
+                return
+            name = posixpath.basename(rel)
+            i = entry.find(name)
+            if i < 0:
+                self._scan(parent, recurse=False)
+                return
+            self._digest = (self._digest - _entry_hash(rel, entry.sizes[i], entry.mtimes[i])
+                            + _entry_hash(rel, st.st_size, st.st_mtime_ns)) & _MASK
+            entry.sizes[i] = st.st_size
+            entry.mtimes[i] = st.st_mtime_ns
+
+    # ---------- queries ----------
+    def _norm(self, path: str) -> str:
+        rel = posixpath.normpath(str(path).replace("\\", "/")).lstrip("/")
+        return "" if rel == "." else rel
+
+    def list_dir(self, path: str = ".") -> Optional[List[str]]:
+        """Sorted entry names, or None when ``path`` is not an indexed directory."""
+        self.refresh()
+        with self._lock:
+            entry = self._dirs.get(self._norm(path))
+            if entry is None:
+                return None
+            return sorted(entry.names + entry.subdirs)
+
+    def iter_files(self, path: str = ".") -> Iterator[Tuple[str, int, int]]:
+        """(relative path, size, mtime_ns) of indexed files under ``path``."""
+        self.refresh()
+        base = self._norm(path)
+        with self._lock:
+            items = [(rel, d) for rel, d in self._dirs.items()
+                     if not base or rel == base or rel.startswith(base + "/")]
+            snapshot = [(rel, list(d.names), list(d.sizes), list(d.mtimes)) for rel, d in items]
+        for rel, names, sizes, mtimes in snapshot:
+            for name, size, mtime in zip(names, sizes, mtimes):
+                yield posixpath.join(rel, name), size, mtime
+
+    def tree(self, path: str = ".", max_depth: int = 3, max_entries: int = 500) -> Optional[str]:
+        """Indented tree of ``path``; directories end with ``/``."""
+        self.refresh()
+        base = self._norm(path)
+        lines: List[str] = []
+        with self._lock:
+            if base not in self._dirs:
+                return None
+
+            def walk(rel: str, depth: int) -> None:
+                entry = self._dirs.get(rel)
+                if entry is None:
+                    return
+                for sub in entry.subdirs:
+                    if len(lines) >= max_entries:
+                        return
+                    child = posixpath.join(rel, sub)
+                    suffix = "" if child in self._dirs else " (not indexed)"
+                    lines.append("  " * depth + sub + "/" + suffix)
+                    if depth + 1 < max_depth:
+                        walk(child, depth + 1)
+                for name in entry.names:
+                    if len(lines) >= max_entries:
+                        return
+                    lines.append("  " * depth + name)
+
+            walk(base, 0)
+        if len(lines) >= max_entries:
+            lines.append(f"… (truncated at {max_entries} entries)")
+        return "\n".join(lines)
+
+    def glob(self, pattern: str, max_results: int = 1000) -> List[str]:
+        """Indexed file paths matching ``pattern`` (``**`` spans directories)."""
+        while pattern.startswith("./"):
+            pattern = pattern[2:]
+        regex = glob_regex(pattern)
+        # Only walk below the pattern's literal directory prefix.
+        literal = []
+        for part in pattern.split("/")[:-1]:
+            if any(c in part for c in "*?["):
+                break
+            literal.append(part)
+        matches = []
+        for rel, _, _ in self.iter_files("/".join(literal) or "."):
+            if regex.match(rel):
+                matches.append(rel)
+        matches.sort()
+        return matches[:max_results]
+
+    def fingerprint(self) -> str:
+        """Stable, order-independent fingerprint of every indexed file's path, size and mtime."""
+        self.refresh()
+        with self._lock:
+            return f"index:{self._digest:016x}:{self._files}"
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"files": self._files, "dirs": len(self._dirs)}
@@ -0,0 +1,63 @@
+"""Per-turn cost of convert_to_openai_messages as a conversation grows.
+
+``useChat`` re-posts the full history each turn. With the conversion cache
+only the new messages are converted; the earlier ones are looked up by id
+and part shape, so the cached cost stays nearly flat as the history grows.
+
+    python -m benchmarks.bench_prompt_conversion
+"""
+import json
+import time
+
+from api.utils import prompt
+from api.utils.prompt import ClientMessage, convert_to_openai_messages
+
+WEATHER = {"hourly": {"time": [f"2024-01-01T{h:02d}:00" for h in range(24)] * 7,
+                      "temperature_2m": [round(10 + h * 0.1, 1) for h in range(168)]}}
+
+
+def make_turn(n: int):
+    return [
+        ClientMessage(id=f"user-{n}", role="user", parts=[{"type": "text", "text": f"What's the weather in city {n}?"}]),
+        ClientMessage(id=f"assistant-{n}", role="assistant", parts=[
+            {"type": "tool-get_current_weather", "toolCallId": f"call-{n}", "state": "output-available",
+             "input": {"latitude": 52.5, "longitude": 13.4 + n}, "output": WEATHER},
+            {"type": "text", "text": "It is mild today. " * 10},
+        ]),
+    ]
+
+
+def uncached(history):
+    return [converted for message in history for converted in prompt._convert_message(message)]
+
+
+def timed_ms(fn, history) -> float:
+    start = time.perf_counter()
+    fn(history)
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    """Replay a 200-turn chat; each turn re-sends the whole history."""
+    prompt._conversion_cache.clear()
+    rows = []
+    history = []
+    for turn in range(1, 201):
+        history.extend(make_turn(turn))
+        misses = prompt._conversion_cache.misses
+        cached_ms = timed_ms(lambda h: convert_to_openai_messages(h, token_budget=None), history)
+        converted = prompt._conversion_cache.misses - misses
+        if turn in (10, 50, 100, 200):
+            rows.append({
+                "turn": turn,
+                "messages": len(history),
+                "uncached_ms": round(timed_ms(uncached, history), 2),
+                "cached_ms": round(cached_ms, 2),
+                "converted_this_turn": converted,
+            })
+    print(json.dumps(rows, indent=2))
+    print(json.dumps(prompt._conversion_cache.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
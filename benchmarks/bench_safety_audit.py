@@ -0,0 +1,67 @@
+"""Safety audit throughput (MB/s) on a plan of large file writes.
+
+Compares the old whole-plan regex over ``model_dump_json()`` with the
+structural auditor, cold and on a retry that changes one step.
+
+    PYTHONPATH=backend python -m benchmarks.bench_safety_audit
+"""
+import json
+import time
+
+from cline_agent.tools.safety_auditor import SafetyAuditor
+from cline_agent.tools.schemas import Plan, PlanStep
+
+SOURCE = '''import json
+from pathlib import Path
+
+
+def load(path: str) -> dict:
+    """Read a JSON settings file."""
+    with open(Path(path), encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+class Settings:
+    def __init__(self, data: dict):
+        self.data = data
+
+    def get(self, key: str, default=None):
+        return self.data.get(key, default)
+'''
+
+
+def make_plan(files: int, file_kb: int, marker: str = "") -> Plan:
+    body = SOURCE * (file_kb * 1024 // len(SOURCE))
+    return Plan(steps=[
+        PlanStep(tool="file_system", command="write", args=[f"pkg/mod_{i}.py", body + (marker if i == 0 else "")])
+        for i in range(files)
+    ])
+
+
+def mb_per_s(fn, plan: Plan, size: int) -> float:
+    start = time.perf_counter()
+    fn(plan)
+    return round(size / (1 << 20) / (time.perf_counter() - start), 1)
+
+
+def main() -> None:
+    rows = []
+    for files, file_kb in ((20, 16), (100, 64), (20, 2048)):
+        plan = make_plan(files, file_kb)
+        size = sum(len(arg) for step in plan.steps for arg in step.args)
+        auditor = SafetyAuditor()
+        legacy = mb_per_s(lambda p: SafetyAuditor.STATIC_DENY.findall(p.model_dump_json()), plan, size)
+        cold = mb_per_s(auditor.audit_plan, plan, size)
+        retry = make_plan(files, file_kb, marker="# revised\n")
+        warm = mb_per_s(auditor.audit_plan, retry, size)
+        rows.append({
+            "plan": f"{files} x {file_kb} KB",
+            "legacy_json_regex_mb_s": legacy,
+            "structural_cold_mb_s": cold,
+            "structural_retry_one_changed_mb_s": warm,
+        })
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
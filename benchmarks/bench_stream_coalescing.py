@@ -0,0 +1,83 @@
+"""Frames and CPU per stream for stream_text with and without delta coalescing.
+
+A fake provider streams tokens in bursts (as real providers do when several
+tokens arrive in one TCP read), across many concurrent streams.
+
+    python -m benchmarks.bench_stream_coalescing
+"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from api.utils.stream import DeltaCoalescing, stream_text
+
+TOKENS = 1000
+BURST = 8
+STREAMS = 200
+
+
+class FakeStream:
+    def __init__(self):
+        self.sent = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.sent > TOKENS:
+            raise StopAsyncIteration
+        if self.sent % BURST == 0:
+            await asyncio.sleep(0.002)
+        self.sent += 1
+        finish = "stop" if self.sent > TOKENS else None
+        delta = SimpleNamespace(content=None if finish else " tok", tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish)], usage=None)
+
+    async def close(self):
+        pass
+
+
+class FakeCompletions:
+    async def create(self, **kwargs):
+        return FakeStream()
+
+
+CLIENT = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+
+
+async def consume(coalesce):
+    frames = 0
+    writes = 0
+    async for chunk in stream_text(CLIENT, [], [], {}, coalesce=coalesce):
+        writes += 1
+        frames += chunk.count("data: ")
+    return frames, writes
+
+
+async def run(coalesce):
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    results = await asyncio.gather(*(consume(coalesce) for _ in range(STREAMS)))
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    frames = sum(f for f, _ in results)
+    writes = sum(w for _, w in results)
+    return {
+        "frames_per_stream": frames // STREAMS,
+        "writes_per_stream": writes // STREAMS,
+        "frames_per_sec": round(frames / wall),
+        "cpu_ms_per_stream": round(cpu * 1000 / STREAMS, 2),
+        "wall_s": round(wall, 2),
+    }
+
+
+def main() -> None:
+    report = {
+        "per_token": asyncio.run(run(None)),
+        "coalesced_15ms": asyncio.run(run(DeltaCoalescing(window_ms=15))),
+        "coalesced_50ms": asyncio.run(run(DeltaCoalescing(window_ms=50))),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()